@@ -1,8 +1,13 @@
 
 import logging
-from typing import Literal, Optional, Dict, Any
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Annotated, Literal, Optional, Dict, Any, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+from pydantic.json_schema import WithJsonSchema
 from langchain_core.prompts import ChatPromptTemplate
 # CORREÇÃO: Importação atualizada para langchain-ollama
 from langchain_ollama import OllamaLLM
@@ -50,25 +55,154 @@ INTENCOES_QUE_PRECISAM_PERIODO = {
     "listar_registros_vendas"
 }
 
+# Cache LRU de intenções por texto normalizado: chave -> (expira_em, intenção)
+TTL_CACHE_INTENCOES_SEGUNDOS = 600
+MAX_CACHE_INTENCOES = 2048
+_cache_intencoes: "OrderedDict[str, Tuple[float, IntencaoConsulta]]" = OrderedDict()
+
+# Perguntas que continuam a anterior ("e do cliente 5?", "e dele?") dependem
+# do histórico da conversa e não são memorizadas. Referências relativas de
+# tempo ("hoje", "este mês") podem ser: a intenção guarda o período simbólico
+# (ex: 'este_mes'), resolvido em datas apenas ao montar a query.
+_PADRAO_CONTINUACAO = re.compile(
+    r"^(?:e|mas|tamb[ée]m)\b|\b(?:del[ea]s?|dess[ea]s?|dest[ea]s?|mesm[oa]s?)\b"
+)
+_PADRAO_ESPACOS = re.compile(r"\s+")
+
+@dataclass(slots=True)
+class Entidades:
+    """
+    Entidades extraídas da pergunta do usuário.
+    
+    Entidades não informadas pelo LLM permanecem como None.
+    
+    Attributes:
+        nome_cliente: Nome (ou parte do nome) do cliente.
+        codigo_cliente: Código do cliente.
+        nome_produto: Nome (ou parte do nome) do produto.
+        codigo_produto: Código do produto.
+        id_pedido: Número do pedido.
+        marca: Marca do produto.
+        cidade: Cidade do cliente.
+        posicao: Posição/status do pedido (ex: 'bloqueado').
+        criterio_classificacao: Critério de ranking (ex: 'mais_vendidos').
+        periodo_tempo: Período da consulta (ex: 'este_mes').
+        limite: Quantidade máxima de registros.
+    """
+    nome_cliente: Optional[str] = None
+    codigo_cliente: Optional[int] = None
+    nome_produto: Optional[str] = None
+    codigo_produto: Optional[Any] = None
+    id_pedido: Optional[int] = None
+    marca: Optional[str] = None
+    cidade: Optional[str] = None
+    posicao: Optional[str] = None
+    criterio_classificacao: Optional[str] = None
+    periodo_tempo: Optional[str] = None
+    limite: Optional[int] = None
+
+    @classmethod
+    def de_dicionario(cls, dados: Optional[Dict[str, Any]]) -> "Entidades":
+        """
+        Cria as entidades a partir do dicionário devolvido pelo LLM.
+        
+        Chaves desconhecidas são descartadas, textos são convertidos para str
+        e campos inteiros (`codigo_cliente`, `id_pedido`, `limite`) são
+        convertidos uma única vez aqui por `_converter_inteiro`; valores que
+        não representam exatamente um inteiro são descartados, como se a
+        entidade não tivesse sido informada.
+        
+        Examples:
+            >>> Entidades.de_dicionario({"cidade": "Recife", "id_pedido": "5", "extra": 1})
+            Entidades(..., id_pedido=5, ..., cidade='Recife', ...)
+        """
+        valores: Dict[str, Any] = {}
+        for chave, valor in (dados or {}).items():
+            if valor is None or chave not in _CAMPOS_ENTIDADES:
+                continue
+            if chave in _CAMPOS_INTEIROS_ENTIDADES:
+                inteiro = _converter_inteiro(valor)
+                if inteiro is None:
+                    logger.warning("Entidade '%s' descartada: valor não inteiro %r", chave, valor)
+                    continue
+                valor = inteiro
+            elif chave in _CAMPOS_TEXTO_ENTIDADES:
+                valor = str(valor)
+            valores[chave] = valor
+        return cls(**valores)
+
+def _converter_inteiro(valor: Any) -> Optional[int]:
+    """
+    Converte um valor devolvido pelo LLM em inteiro, sem arredondar.
+    
+    Aceita apenas int (exceto bool), float sem parte fracionária e textos
+    só com dígitos. Qualquer outro valor devolve None: truncar `12.7` ou
+    converter `True` em 1 consultaria outro cliente ou pedido.
+    
+    Examples:
+        >>> _converter_inteiro("123"), _converter_inteiro(45.0)
+        (123, 45)
+        >>> _converter_inteiro("123.9") is None, _converter_inteiro(True) is None
+        (True, True)
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float):
+        return int(valor) if valor.is_integer() else None
+    if isinstance(valor, str):
+        texto = valor.strip()
+        return int(texto) if texto.isascii() and texto.isdigit() else None
+    return None
+
+_CAMPOS_ENTIDADES = frozenset(campo.name for campo in fields(Entidades))
+_CAMPOS_TEXTO_ENTIDADES = frozenset(
+    campo.name for campo in fields(Entidades) if campo.type == Optional[str]
+)
+_CAMPOS_INTEIROS_ENTIDADES = frozenset(
+    campo.name for campo in fields(Entidades) if campo.type == Optional[int]
+)
+
+# Esquema compacto das entidades (só nomes e tipos) usado nas instruções de
+# formato do prompt, no lugar do esquema completo gerado para a dataclass
+_ESQUEMA_ENTIDADES = {
+    "type": "object",
+    "properties": {
+        campo.name: {"type": "integer"} if campo.name in _CAMPOS_INTEIROS_ENTIDADES
+        else {"type": "string"} if campo.name in _CAMPOS_TEXTO_ENTIDADES
+        else {"type": ["string", "integer"]}
+        for campo in fields(Entidades)
+    },
+}
+
 class IntencaoConsulta(BaseModel):
     """
     Representa a intenção e as entidades extraídas da pergunta do usuário.
     
     Attributes:
         intencao: A intenção principal identificada na consulta do usuário.
-        entidades: Dicionário com as entidades extraídas (nomes, códigos, períodos, etc).
+        entidades: Entidades extraídas (nomes, códigos, períodos, etc).
         mensagem_esclarecimento: Mensagem a ser exibida quando necessário esclarecimento.
     """
     intencao: TipoIntencao = Field(description="A intenção principal extraída da consulta.")
-    entidades: Dict[str, Any] = Field(
-        default_factory=dict,
-        description="Dicionário flexível para armazenar todas as entidades extraídas."
+    entidades: Annotated[Entidades, WithJsonSchema(_ESQUEMA_ENTIDADES)] = Field(
+        default_factory=Entidades,
+        description="Entidades extraídas da consulta; omita as que não forem mencionadas."
     )
     mensagem_esclarecimento: Optional[str] = Field(
         default=None,
         description="Mensagem para o usuário se a intenção for 'necessita_esclarecimento'."
     )
 
+    @field_validator("entidades", mode="before")
+    @classmethod
+    def _converter_entidades(cls, valor: Any) -> Any:
+        """Converte o dicionário devolvido pelo LLM em `Entidades`."""
+        if valor is None or isinstance(valor, dict):
+            return Entidades.de_dicionario(valor)
+        return valor
+
 # Parser JSON que utiliza o modelo Pydantic.
 parser_json = JsonOutputParser(pydantic_object=IntencaoConsulta)
 
@@ -176,22 +310,25 @@ async def obter_intencao(llm: OllamaLLM, entrada_usuario: str) -> IntencaoConsul
         {'criterio_classificacao': 'mais_vendidos', 'periodo_tempo': 'este_mes', 'limite': 10}
     """
     logger.info("Iniciando roteamento de intenção do usuário.")
-    cadeia_processamento = prompt | llm | parser_json
+    # Modo JSON do Ollama: a geração é restrita a JSON válido, evitando falhas
+    # de parse (e a classificação 'desconhecido' que elas causam). Aplicado só
+    # nesta cadeia, pois a mesma instância gera texto livre no sumarizador.
+    cadeia_processamento = prompt | llm.bind(format="json") | parser_json
     
     try:
-        logger.debug(f"Enviando para o LLM para extração: '{entrada_usuario}'")
+        logger.debug("Enviando para o LLM para extração: '%s'", entrada_usuario)
         resultado_dict = await cadeia_processamento.ainvoke({"entrada_usuario": entrada_usuario})
-        logger.info(f"Dicionário extraído com sucesso: {resultado_dict}")
+        logger.info("Dicionário extraído com sucesso: %s", resultado_dict)
         
         intencao_obj = IntencaoConsulta(**(resultado_dict or {}))
         
         # Validação adicional: verificar se intenções que precisam de período têm período válido
         if intencao_obj.intencao in INTENCOES_QUE_PRECISAM_PERIODO:
-            periodo = intencao_obj.entidades.get("periodo_tempo")
+            periodo = intencao_obj.entidades.periodo_tempo
             
             # Se não há período ou é "sempre", forçar esclarecimento
             if not periodo or periodo == "sempre":
-                logger.warning(f"Período obrigatório não fornecido para intenção: {intencao_obj.intencao}")
+                logger.warning("Período obrigatório não fornecido para intenção: %s", intencao_obj.intencao)
                 
                 mensagens_esclarecimento = {
                     "buscar_produtos_classificados": "Para consultar os produtos mais vendidos, preciso saber o período. Você quer ver os dados de hoje, este mês, último mês ou outro período específico?",
@@ -201,7 +338,7 @@ async def obter_intencao(llm: OllamaLLM, entrada_usuario: str) -> IntencaoConsul
                 
                 return IntencaoConsulta(
                     intencao="necessita_esclarecimento",
-                    entidades={},
+                    entidades=Entidades(),
                     mensagem_esclarecimento=mensagens_esclarecimento.get(
                         intencao_obj.intencao, 
                         "Para esta consulta, preciso saber o período de tempo. Você pode especificar: hoje, este mês, último mês ou outro período?"
@@ -211,5 +348,98 @@ async def obter_intencao(llm: OllamaLLM, entrada_usuario: str) -> IntencaoConsul
         return intencao_obj
         
     except Exception as e:
-        logger.error(f"Erro ao extrair intenção com o parser JSON: {e}", exc_info=True)
-        return IntencaoConsulta(intencao="desconhecido")
\ No newline at end of file
+        logger.error("Erro ao extrair intenção com o parser JSON: %s", e, exc_info=True)
+        return IntencaoConsulta(intencao="desconhecido")
+
+
+def _normalizar_entrada(entrada_usuario: str) -> str:
+    """Normaliza o texto do usuário para uso como chave do cache de intenções."""
+    return _PADRAO_ESPACOS.sub(" ", entrada_usuario.strip().lower())
+
+
+def limpar_cache_intencoes() -> None:
+    """Remove todas as intenções memorizadas por `obter_intencao_em_cache`."""
+    _cache_intencoes.clear()
+
+
+async def obter_intencao_em_cache(
+    llm: OllamaLLM, entrada_usuario: str, pergunta_atual: Optional[str] = None
+) -> IntencaoConsulta:
+    """
+    Versão de `obter_intencao` com cache LRU pela pergunta normalizada.
+    
+    Evita uma nova chamada ao LLM quando a mesma pergunta é repetida. A chave
+    é apenas a pergunta atual: o histórico (com horários) tornaria cada chave
+    única. Continuações da pergunta anterior ("e do cliente 5?") e
+    classificações 'desconhecido' (que podem vir de falhas do LLM) não são
+    memorizadas. Perguntas com "hoje" ou "este mês" são: a intenção guarda o
+    período simbólico, convertido em datas só ao montar a query.
+    
+    Args:
+        llm: Instância do modelo OllamaLLM para processamento de linguagem natural.
+        entrada_usuario: Texto enviado ao LLM (pode incluir o histórico).
+        pergunta_atual: Apenas a mensagem atual, usada como chave do cache.
+            Se omitida, usa `entrada_usuario`.
+    
+    Returns:
+        IntencaoConsulta: Cópia independente da intenção identificada.
+        
+    Examples:
+        >>> resultado = await obter_intencao_em_cache(llm, "qual o limite do cliente 123?")
+        >>> resultado = await obter_intencao_em_cache(llm, "Qual o limite do  cliente 123?")  # cache
+    """
+    chave = _normalizar_entrada(pergunta_atual if pergunta_atual is not None else entrada_usuario)
+    if _PADRAO_CONTINUACAO.search(chave):
+        return await obter_intencao(llm, entrada_usuario)
+    
+    agora = time.monotonic()
+    entrada = _cache_intencoes.get(chave)
+    if entrada:
+        if entrada[0] > agora:
+            _cache_intencoes.move_to_end(chave)
+            logger.info("Intenção obtida do cache, sem chamada ao LLM.")
+            return entrada[1].model_copy(deep=True)
+        del _cache_intencoes[chave]
+    
+    intencao_obj = await obter_intencao(llm, entrada_usuario)
+    
+    if intencao_obj.intencao != "desconhecido":
+        _cache_intencoes[chave] = (agora + TTL_CACHE_INTENCOES_SEGUNDOS, intencao_obj.model_copy(deep=True))
+        if len(_cache_intencoes) > MAX_CACHE_INTENCOES:
+            _cache_intencoes.popitem(last=False)
+    
+    return intencao_obj
+
+
+# Pergunta curta usada apenas para carregar o modelo na inicialização
+TEXTO_AQUECIMENTO = "qual a posição do pedido 1?"
+
+
+async def aquecer_llm(llm: OllamaLLM) -> bool:
+    """
+    Carrega o modelo no Ollama antes da primeira pergunta real.
+    
+    Executa o prompt do roteador uma vez, o que carrega o modelo na memória
+    e deixa o prefixo do prompt (instruções e exemplos) em cache no Ollama.
+    O resultado é descartado e não passa pelo cache de intenções.
+    
+    Args:
+        llm: Instância do modelo OllamaLLM a ser aquecida.
+    
+    Returns:
+        bool: True se o modelo respondeu; False se o aquecimento falhou
+        (a primeira consulta real carregará o modelo).
+        
+    Examples:
+        >>> await aquecer_llm(llm)
+        True
+    """
+    inicio = time.monotonic()
+    try:
+        await (prompt | llm).ainvoke({"entrada_usuario": TEXTO_AQUECIMENTO})
+    except Exception as e:
+        logger.warning("Não foi possível aquecer o LLM na inicialização: %s", e)
+        return False
+    
+    logger.info("LLM aquecido em %.1fs.", time.monotonic() - inicio)
+    return True
@@ -10,7 +10,7 @@ Versão 2.0: Tratamento robusto de respostas do OllamaLLM.
 
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import OllamaLLM
@@ -53,6 +53,33 @@ Formule sua resposta final abaixo:
 
 prompt = ChatPromptTemplate.from_template(template=template_prompt)
 
+# Descrição dos códigos de posição de pedidos (PCPEDC.POSICAO)
+DESCRICOES_POSICAO = {
+    'L': 'Liberado',
+    'B': 'Bloqueado',
+    'P': 'Pendente',
+    'F': 'Faturado'
+}
+
+RESPOSTA_SEM_DADOS = (
+    "Desculpe, não encontrei nenhum resultado para a sua consulta no banco de dados. "
+    "Isso pode acontecer se:\n"
+    "• Os critérios de busca estão muito específicos\n"
+    "• O período selecionado não tem movimentação\n"
+    "• O item pesquisado não existe no cadastro\n\n"
+    "Tente ajustar os parâmetros da sua busca ou me pergunte de outra forma."
+)
+
+# Respostas do LLM mais curtas que isto (sem espaços nas pontas) são
+# descartadas em favor da resposta fallback
+TAMANHO_MINIMO_RESPOSTA = 10
+
+# Acrescentado ao texto já enviado quando o LLM falha no meio do streaming
+AVISO_RESPOSTA_INTERROMPIDA = (
+    "\n\n⚠️ A resposta foi interrompida por uma falha ao gerar o texto. "
+    "Por favor, tente novamente."
+)
+
 
 async def sumarizar_resultados(
     llm: OllamaLLM, 
@@ -99,14 +126,7 @@ async def sumarizar_resultados(
     # Validação de entrada
     if not dados:
         logger.warning("Não há dados para sumarizar. Retornando mensagem contextual.")
-        return (
-            "Desculpe, não encontrei nenhum resultado para a sua consulta no banco de dados. "
-            "Isso pode acontecer se:\n"
-            "• Os critérios de busca estão muito específicos\n"
-            "• O período selecionado não tem movimentação\n"
-            "• O item pesquisado não existe no cadastro\n\n"
-            "Tente ajustar os parâmetros da sua busca ou me pergunte de outra forma."
-        )
+        return RESPOSTA_SEM_DADOS
     
     # Pré-processar dados para melhor formatação
     dados_processados = _preprocessar_dados(dados)
@@ -122,7 +142,7 @@ async def sumarizar_resultados(
             ensure_ascii=False
         )
         
-        logger.debug(f"Enviando {len(dados)} registros para sumarização.")
+        logger.debug("Enviando %s registros para sumarização.", len(dados))
         
         # Invocar o LLM
         resposta_raw = await cadeia_processamento.ainvoke({
@@ -136,7 +156,7 @@ async def sumarizar_resultados(
         resultado = _extrair_texto_resposta(resposta_raw)
         
         # Validar resposta
-        if not resultado or len(resultado.strip()) < 10:
+        if not resultado or len(resultado.strip()) < TAMANHO_MINIMO_RESPOSTA:
             logger.warning("Resposta da IA muito curta ou vazia, usando fallback.")
             return _gerar_resposta_fallback(pergunta, dados)
         
@@ -146,14 +166,126 @@ async def sumarizar_resultados(
         return resultado_final
         
     except json.JSONDecodeError as e:
-        logger.error(f"Erro ao serializar dados JSON: {e}", exc_info=True)
+        logger.error("Erro ao serializar dados JSON: %s", e, exc_info=True)
         return _gerar_resposta_fallback(pergunta, dados)
         
     except Exception as e:
-        logger.error(f"Erro ao sumarizar resultados com o LLM: {e}", exc_info=True)
+        logger.error("Erro ao sumarizar resultados com o LLM: %s", e, exc_info=True)
         return _gerar_resposta_fallback(pergunta, dados)
 
 
+async def sumarizar_resultados_em_partes(
+    llm: OllamaLLM,
+    pergunta: str,
+    dados: Optional[List[Dict[str, Any]]]
+) -> AsyncIterator[str]:
+    """
+    Versão em streaming de `sumarizar_resultados`.
+    
+    Repassa os trechos de texto à medida que o LLM os gera, reduzindo o tempo
+    até o primeiro byte para clientes que exibem a resposta progressivamente.
+    O pós-processamento (resumo e sugestões) é enviado como último trecho.
+    
+    O texto enviado é o mesmo de `sumarizar_resultados`: nada é repassado
+    até o início da resposta atingir `TAMANHO_MINIMO_RESPOSTA` caracteres, e
+    os espaços nas pontas são removidos (os finais de cada trecho só seguem
+    junto com o texto seguinte). Se o LLM falhar ou gerar uma resposta curta
+    demais antes disso, apenas a resposta fallback é enviada; se falhar
+    depois, `AVISO_RESPOSTA_INTERROMPIDA` encerra o texto já enviado.
+    
+    Args:
+        llm: Instância do modelo OllamaLLM para processamento de linguagem natural.
+        pergunta: A pergunta original do usuário que gerou os dados.
+        dados: Lista de dicionários com os dados retornados da consulta.
+    
+    Yields:
+        str: Trechos consecutivos da resposta formatada.
+        
+    Examples:
+        >>> partes = sumarizar_resultados_em_partes(llm, "quais produtos?", dados)
+        >>> async for trecho in partes:
+        ...     print(trecho, end="")
+    """
+    logger.info("Iniciando a sumarização dos resultados em streaming.")
+    
+    if not dados:
+        logger.warning("Não há dados para sumarizar. Retornando mensagem contextual.")
+        yield RESPOSTA_SEM_DADOS
+        return
+    
+    dados_json_str = json.dumps(
+        _preprocessar_dados(dados),
+        indent=2,
+        default=str,
+        ensure_ascii=False
+    )
+    cadeia_processamento = prompt | llm
+    inicio: List[str] = []
+    trechos: List[str] = []
+    espacos_pendentes = ""
+    
+    try:
+        async for trecho in cadeia_processamento.astream({
+            "pergunta": pergunta,
+            "dados": dados_json_str
+        }):
+            texto = _extrair_texto_bruto(trecho)
+            if not texto:
+                continue
+            if not trechos:
+                # Retém o início até saber que a resposta não será descartada
+                inicio.append(texto)
+                texto = "".join(inicio).lstrip()
+                if len(texto.rstrip()) < TAMANHO_MINIMO_RESPOSTA:
+                    continue
+            corpo = texto.rstrip()
+            if not corpo:
+                espacos_pendentes += texto
+                continue
+            trechos.append(espacos_pendentes + corpo)
+            espacos_pendentes = texto[len(corpo):]
+            yield trechos[-1]
+    except Exception as e:
+        logger.error("Erro ao sumarizar resultados com o LLM: %s", e, exc_info=True)
+        if not trechos:
+            yield _gerar_resposta_fallback(pergunta, dados)
+        else:
+            yield AVISO_RESPOSTA_INTERROMPIDA
+        return
+    
+    if not trechos:
+        logger.warning("Resposta da IA muito curta ou vazia, usando fallback.")
+        yield _gerar_resposta_fallback(pergunta, dados)
+        return
+    
+    resultado = "".join(trechos)
+    
+    logger.info("Sumarização gerada com sucesso.")
+    
+    # O pós-processamento só acrescenta texto ao final da resposta
+    complemento = _pos_processar_resposta(resultado, dados)[len(resultado):]
+    if complemento:
+        yield complemento
+
+
+def _extrair_texto_bruto(trecho: Any) -> str:
+    """
+    Extrai o texto de um trecho do streaming sem remover espaços.
+    
+    Diferente de `_extrair_texto_resposta`, preserva espaços e quebras de
+    linha, que separam os trechos consecutivos gerados pelo LLM.
+    
+    Args:
+        trecho: Trecho bruto retornado pelo `astream` do OllamaLLM.
+        
+    Returns:
+        str: Texto do trecho.
+    """
+    if isinstance(trecho, str):
+        return trecho
+    return str(getattr(trecho, 'content', None) or getattr(trecho, 'text', None) or "")
+
+
 def _extrair_texto_resposta(resposta_raw: Any) -> str:
     """
     Extrai texto de diferentes tipos de resposta do OllamaLLM.
@@ -230,13 +362,7 @@ def _preprocessar_dados(dados: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                 registro_processado[chave] = valor
             elif chave.lower() == 'posicao':
                 # Mapear códigos de posição
-                mapa_posicao = {
-                    'L': 'Liberado',
-                    'B': 'Bloqueado', 
-                    'P': 'Pendente',
-                    'F': 'Faturado'
-                }
-                registro_processado[chave] = mapa_posicao.get(valor, valor)
+                registro_processado[chave] = DESCRICOES_POSICAO.get(valor, valor)
             elif chave.lower() == 'bloqueio':
                 # Mapear status de bloqueio
                 registro_processado[chave] = 'Bloqueado' if valor == 'S' else 'Ativo'
@@ -304,7 +430,7 @@ def _gerar_resposta_fallback(pergunta: str, dados: List[Dict[str, Any]]) -> str:
             return resposta
             
     except Exception as e:
-        logger.error(f"Erro ao gerar resposta fallback: {e}")
+        logger.error("Erro ao gerar resposta fallback: %s", e)
         return (
             "Encontrei dados para sua consulta, mas houve um problema ao formatá-los. "
             "Por favor, tente fazer sua pergunta de forma mais específica."
@@ -349,4 +475,90 @@ def _pos_processar_resposta(resposta: str, dados: List[Dict[str, Any]]) -> str:
         if not any(sugestao in resposta.lower() for sugestao in ['posso', 'gostaria', 'deseja']):
             resposta += "\n\n💡 **Próximos passos:** Posso mostrar os itens de algum pedido ou verificar outros períodos."
     
-    return resposta
\ No newline at end of file
+    return resposta
+
+
+# --- Respostas sem LLM para consultas pontuais ---
+#
+# Consultas que retornam um único registro com um ou dois valores (limite,
+# status, valor ou posição de um pedido) não precisam do LLM: um modelo de
+# texto fixo responde na hora, sem os segundos de uma chamada ao modelo.
+
+# Troca os separadores de milhar e decimal do formato americano para o brasileiro
+_SEPARADORES_BR = str.maketrans(",.", ".,")
+
+def _formatar_moeda(valor: Any) -> str:
+    """
+    Formata um valor monetário no padrão brasileiro.
+    
+    Examples:
+        >>> _formatar_moeda(1234.5)
+        'R$ 1.234,50'
+    """
+    if valor is None:
+        return "não informado"
+    return "R$ " + f"{float(valor):,.2f}".translate(_SEPARADORES_BR)
+
+
+def _formatar_data(valor: Any) -> str:
+    """
+    Formata uma data como DD/MM/AAAA.
+    
+    Examples:
+        >>> _formatar_data(datetime(2024, 1, 15))
+        '15/01/2024'
+    """
+    if valor is None:
+        return "não informada"
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%d/%m/%Y")
+    return str(valor)
+
+
+def formatar_limite_credito(registro: Dict[str, Any]) -> str:
+    """Resposta direta para `consultar_limite_credito`."""
+    return (
+        f"💳 O limite de crédito do cliente {registro.get('cliente')} "
+        f"(código {registro.get('codcli')}) é de {_formatar_moeda(registro.get('limcred'))}."
+    )
+
+
+def formatar_status_cliente(registro: Dict[str, Any]) -> str:
+    """Resposta direta para `verificar_status_cliente`."""
+    cliente = f"{registro.get('cliente')} (código {registro.get('codcli')})"
+    if registro.get('bloqueio') != 'S':
+        return f"✅ O cliente {cliente} está ativo."
+    
+    resposta = f"🔒 O cliente {cliente} está bloqueado"
+    if registro.get('dtbloq'):
+        resposta += f" desde {_formatar_data(registro['dtbloq'])}"
+    resposta += "."
+    if registro.get('motivobloq'):
+        resposta += f"\nMotivo: {registro['motivobloq']}"
+    return resposta
+
+
+def formatar_valor_pedido(registro: Dict[str, Any]) -> str:
+    """Resposta direta para `consultar_valor_pedido`."""
+    return (
+        f"💰 O pedido {registro.get('numped')}, de {_formatar_data(registro.get('data'))}, "
+        f"tem valor total de {_formatar_moeda(registro.get('vltotal'))}."
+    )
+
+
+def formatar_data_entrega_pedido(registro: Dict[str, Any]) -> str:
+    """Resposta direta para `consultar_data_entrega_pedido`."""
+    pedido = f"O pedido {registro.get('numped')}, de {_formatar_data(registro.get('data'))},"
+    if not registro.get('dtentrega'):
+        return f"📦 {pedido} ainda não tem data de entrega definida."
+    return f"📦 {pedido} tem entrega prevista para {_formatar_data(registro['dtentrega'])}."
+
+
+def formatar_posicao_pedido(registro: Dict[str, Any]) -> str:
+    """Resposta direta para `verificar_posicao_pedido`."""
+    posicao = registro.get('posicao')
+    descricao = DESCRICOES_POSICAO.get(posicao, posicao or "sem posição informada")
+    return (
+        f"📋 O pedido {registro.get('numped')}, de {_formatar_data(registro.get('data'))}, "
+        f"está {str(descricao).lower()}."
+    )
@@ -16,13 +16,26 @@ import base64
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Coroutine, Dict, List, Optional, Set
 
 import httpx
 import aiofiles
 
 logger = logging.getLogger(__name__)
 
+# Intervalos (em segundos) entre as verificações de encerramento da sessão
+ESPERAS_ENCERRAMENTO_SESSAO = (0.1, 0.2, 0.4, 0.8, 1.6)
+
+# Status que indicam que a sessão anterior já foi removida do WAHA
+STATUS_SESSAO_ENCERRADA = {"NOT_FOUND", "STOPPED"}
+
+# Conexões mantidas abertas com o WAHA. O padrão do httpx encerra conexões
+# ociosas após 5s, o que, no intervalo comum entre mensagens, obriga um novo
+# handshake a cada envio; 60s cobre uma conversa ativa.
+LIMITES_CONEXOES_WAHA = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0
+)
+
 
 @dataclass
 class ConfiguracaoWaha:
@@ -81,6 +94,13 @@ class ClienteWaha:
         self._configurar_headers()
         self._inicializar_cache()
 
+        # Payload base do indicador de digitação, reaproveitado a cada envio
+        self._url_start_typing = f"{self.config.base_url}/api/startTyping"
+        self._payload_typing_base = {"session": self.config.session_name}
+
+        # Referências às tasks em segundo plano (evita coleta prematura)
+        self._tasks_background: Set[asyncio.Task] = set()
+
         # Criar diretório temporário se não existir
         self.temp_dir = self.config.temp_dir
         self.temp_dir.mkdir(exist_ok=True, parents=True)
@@ -90,6 +110,7 @@ class ClienteWaha:
             timeout=self.config.timeout,
             headers=self.headers,
             base_url=self.config.base_url,
+            limits=LIMITES_CONEXOES_WAHA,
         )
 
         logger.info(
@@ -171,7 +192,7 @@ class ClienteWaha:
         Returns:
             bool: True se o cache ainda é válido.
         """
-        if not self.session_cache["last_check"]:
+        if not self.session_cache["last_check"] or self.session_cache["status"] is None:
             return False
 
         tempo_decorrido = datetime.now().timestamp() - self.session_cache["last_check"]
@@ -337,7 +358,7 @@ class ClienteWaha:
 
             # Parar sessão existente primeiro
             await self.parar_sessao()
-            await asyncio.sleep(3)  # Aguardar um pouco mais para garantir limpeza
+            await self._aguardar_sessao_encerrada()
 
             # Configuração robusta da sessão
             url = f"{self.config.base_url}/api/sessions"
@@ -374,6 +395,26 @@ class ClienteWaha:
             logger.error(f"Erro ao iniciar sessão: {e}", exc_info=True)
             return {"sucesso": False, "erro": str(e), "webhook_tentado": webhook_url}
 
+    async def _aguardar_sessao_encerrada(self) -> bool:
+        """
+        Aguarda a sessão ser removida no WAHA usando backoff exponencial.
+
+        Substitui a espera fixa após `parar_sessao`: consulta o status com
+        intervalos crescentes e retorna assim que a sessão deixar de existir.
+
+        Returns:
+            bool: True se a sessão foi encerrada dentro do tempo limite.
+        """
+        for intervalo in ESPERAS_ENCERRAMENTO_SESSAO:
+            await asyncio.sleep(intervalo)
+            status = await self.verificar_sessao(usar_cache=False)
+            if status.get("status") in STATUS_SESSAO_ENCERRADA:
+                logger.debug(f"Sessão encerrada após consulta de status: {status.get('status')}")
+                return True
+
+        logger.warning("Sessão ainda não encerrada após aguardar; prosseguindo com a criação")
+        return False
+
     async def _resolver_webhook_url(self) -> str:
         """
         Resolve automaticamente a URL do webhook.
@@ -538,14 +579,14 @@ class ClienteWaha:
             chat_id_formatado = self._formatar_chat_id(chat_id)
             duracao = min(duracao, 10)  # Limitar a 10 segundos
 
-            url = f"{self.config.base_url}/api/startTyping"
-            payload = {
-                "session": self.config.session_name,
+            payload = self._payload_typing_base | {
                 "chatId": chat_id_formatado,
                 "duration": duracao * 1000  # Converter para milissegundos
             }
 
-            response = await self._fazer_request_com_retry("POST", url, json=payload)
+            response = await self._fazer_request_com_retry(
+                "POST", self._url_start_typing, json=payload, timeout=5
+            )
 
             if response.status_code in [200, 201, 204]:
                 logger.debug(f"Indicador de digitação enviado para {chat_id_formatado}")
@@ -558,6 +599,52 @@ class ClienteWaha:
             logger.error(f"Erro ao enviar typing: {e}")
             return False
 
+    def disparar_typing(self, chat_id: str, duracao: int = 3) -> asyncio.Task:
+        """
+        Dispara o indicador de "digitando..." sem aguardar a resposta do WAHA.
+
+        O indicador é apenas um retorno visual para o usuário, então não há
+        motivo para bloquear o processamento da mensagem esperando o request.
+
+        Args:
+            chat_id: ID do chat.
+            duracao: Duração em segundos do indicador (máximo 10).
+
+        Returns:
+            asyncio.Task: Task em segundo plano que envia o indicador.
+
+        Examples:
+            >>> cliente = ClienteWaha()
+            >>> cliente.disparar_typing("5511999999999@c.us", 3)
+        """
+        return self._disparar_em_background(self.enviar_typing(chat_id, duracao))
+
+    def _disparar_em_background(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        """
+        Agenda uma corrotina em segundo plano mantendo referência à task.
+
+        Args:
+            coro: Corrotina a ser executada.
+
+        Returns:
+            asyncio.Task: Task criada.
+        """
+        task = asyncio.create_task(coro)
+        self._tasks_background.add(task)
+        task.add_done_callback(self._finalizar_task_background)
+        return task
+
+    def _finalizar_task_background(self, task: asyncio.Task) -> None:
+        """
+        Remove a task finalizada e registra eventuais exceções.
+
+        Args:
+            task: Task finalizada.
+        """
+        self._tasks_background.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.debug(f"Task em segundo plano falhou: {task.exception()}")
+
     async def baixar_audio(self, message_data: Dict[str, Any]) -> Optional[str]:
         """
         Baixa arquivo de áudio do WhatsApp.
@@ -603,9 +690,10 @@ class ClienteWaha:
             if response.status_code == 200:
                 media_data = response.json()
                 
-                # Decodificar base64 e salvar arquivo
+                # Decodificar base64 (fora do event loop, pois áudios longos
+                # somam alguns MB) e salvar arquivo
                 if "data" in media_data:
-                    audio_bytes = base64.b64decode(media_data["data"])
+                    audio_bytes = await asyncio.to_thread(base64.b64decode, media_data["data"])
                     
                     async with aiofiles.open(filepath, 'wb') as f:
                         await f.write(audio_bytes)
@@ -693,6 +781,21 @@ class ClienteWaha:
             logger.error(f"Erro ao remover arquivo temporário: {e}")
             return False
 
+    def disparar_limpeza_arquivo_temp(self, filepath: str) -> asyncio.Task:
+        """
+        Remove o arquivo temporário em segundo plano.
+
+        Depois da transcrição o arquivo não é mais necessário, então a resposta
+        ao usuário não precisa aguardar a remoção do disco.
+
+        Args:
+            filepath: Caminho do arquivo a ser removido.
+
+        Returns:
+            asyncio.Task: Task em segundo plano que remove o arquivo.
+        """
+        return self._disparar_em_background(self.limpar_arquivo_temp(filepath))
+
     def _formatar_chat_id(self, chat_id: str) -> str:
         """
         Formata chat_id para o padrão esperado pelo WAHA.
@@ -799,6 +902,8 @@ class ClienteWaha:
 
     async def close(self) -> None:
         """Encerra o cliente HTTP."""
+        for task in list(self._tasks_background):
+            task.cancel()
         await self._client.aclose()
 
 
@@ -15,7 +15,8 @@ Principais responsabilidades:
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 import json
@@ -44,12 +45,13 @@ class SessaoUsuario:
     def __init__(self, usuario_id: str, timeout_minutos: int = 30, max_mensagens: int = 10):
         self.usuario_id = usuario_id
         self.mensagens: List[MensagemContexto] = []
-        self.ultima_atividade = datetime.now()
+        self.ultima_atividade = time.time()
         self.timeout_minutos = timeout_minutos
         self.max_mensagens = max_mensagens
         
         # Estatísticas úteis para debug
         self.total_mensagens_recebidas = 0
+        self._contagem_por_tipo: Dict[str, int] = {}  # tipo -> mensagens no histórico
         self.sessao_iniciada = datetime.now()
     
     def adicionar_mensagem(self, texto: str, tipo: str = "text") -> None:
@@ -58,24 +60,44 @@ class SessaoUsuario:
         
         É como escrever uma nova linha no caderno de conversa.
         """
+        agora = time.time()
         nova_mensagem = MensagemContexto(
             texto=texto,
-            timestamp=datetime.now().timestamp(),
+            timestamp=agora,
             tipo=tipo
         )
         
         self.mensagens.append(nova_mensagem)
-        self.ultima_atividade = datetime.now()
+        self.ultima_atividade = agora
         self.total_mensagens_recebidas += 1
+        self._contagem_por_tipo[tipo] = self._contagem_por_tipo.get(tipo, 0) + 1
         
         # Manter apenas as últimas N mensagens para não sobrecarregar a memória
         if len(self.mensagens) > self.max_mensagens:
             # Remove mensagens mais antigas, mas mantém pelo menos 3 para contexto básico
             mensagens_para_remover = len(self.mensagens) - max(3, self.max_mensagens)
+            for mensagem_removida in self.mensagens[:mensagens_para_remover]:
+                self._decrementar_contagem_tipo(mensagem_removida.tipo)
             self.mensagens = self.mensagens[mensagens_para_remover:]
             
         logger.debug(f"Mensagem adicionada para {self.usuario_id}. Total: {len(self.mensagens)}")
     
+    def _decrementar_contagem_tipo(self, tipo: str) -> None:
+        """Atualiza o contador de um tipo quando uma mensagem sai do histórico"""
+        restantes = self._contagem_por_tipo.get(tipo, 0) - 1
+        if restantes > 0:
+            self._contagem_por_tipo[tipo] = restantes
+        else:
+            self._contagem_por_tipo.pop(tipo, None)
+    
+    def contar_mensagens_por_tipo(self, tipo: str) -> int:
+        """
+        Retorna quantas mensagens de um tipo estão no histórico atual.
+        
+        Usa contadores mantidos incrementalmente, sem percorrer as mensagens.
+        """
+        return self._contagem_por_tipo.get(tipo, 0)
+    
     def adicionar_resposta_bot(self, resposta: str) -> None:
         """
         Adiciona a resposta do bot à última mensagem.
@@ -93,8 +115,8 @@ class SessaoUsuario:
         
         É como verificar se alguém parou de conversar há muito tempo.
         """
-        tempo_inativo = datetime.now() - self.ultima_atividade
-        return tempo_inativo > timedelta(minutes=self.timeout_minutos)
+        tempo_inativo = time.time() - self.ultima_atividade
+        return tempo_inativo > self.timeout_minutos * 60
     
     def obter_contexto_formatado(self) -> str:
         """
@@ -133,10 +155,11 @@ class SessaoUsuario:
             "usuario_id": self.usuario_id,
             "total_mensagens": len(self.mensagens),
             "mensagens_recebidas": self.total_mensagens_recebidas,
+            "mensagens_por_tipo": dict(self._contagem_por_tipo),
             "sessao_iniciada": self.sessao_iniciada.strftime("%H:%M:%S"),
-            "ultima_atividade": self.ultima_atividade.strftime("%H:%M:%S"),
+            "ultima_atividade": datetime.fromtimestamp(self.ultima_atividade).strftime("%H:%M:%S"),
             "tempo_ativo_minutos": int(tempo_ativo.total_seconds() / 60),
-            "expira_em_minutos": max(0, self.timeout_minutos - int((datetime.now() - self.ultima_atividade).total_seconds() / 60))
+            "expira_em_minutos": max(0, self.timeout_minutos - int((time.time() - self.ultima_atividade) / 60))
         }
 
 class GerenciadorContexto:
@@ -183,6 +206,23 @@ class GerenciadorContexto:
         
         self._task_limpeza = asyncio.create_task(limpeza_periodica())
     
+    def _registrar_mensagem(self, usuario_id: str, texto: str, tipo: str) -> SessaoUsuario:
+        """Adiciona a mensagem à sessão do usuário, criando-a se necessário."""
+        sessao = self.sessoes.get(usuario_id)
+        if sessao is None:
+            sessao = SessaoUsuario(
+                usuario_id=usuario_id,
+                timeout_minutos=self.timeout_minutos,
+                max_mensagens=self.max_mensagens
+            )
+            self.sessoes[usuario_id] = sessao
+            self.total_sessoes_criadas += 1
+            logger.info("Nova sessão criada para usuário: %s", usuario_id)
+        
+        sessao.adicionar_mensagem(texto, tipo)
+        logger.debug("Mensagem adicionada para %s: %.50s...", usuario_id, texto)
+        return sessao
+    
     async def adicionar_mensagem(self, usuario_id: str, texto: str, tipo: str = "text") -> None:
         """
         Adiciona uma mensagem para um usuário específico.
@@ -190,20 +230,17 @@ class GerenciadorContexto:
         Se é a primeira vez que este usuário está conversando, 
         criamos um novo caderno para ele.
         """
-        # Criar sessão se não existir
-        if usuario_id not in self.sessoes:
-            self.sessoes[usuario_id] = SessaoUsuario(
-                usuario_id=usuario_id,
-                timeout_minutos=self.timeout_minutos,
-                max_mensagens=self.max_mensagens
-            )
-            self.total_sessoes_criadas += 1
-            logger.info(f"Nova sessão criada para usuário: {usuario_id}")
-        
-        # Adicionar mensagem à sessão
-        self.sessoes[usuario_id].adicionar_mensagem(texto, tipo)
+        self._registrar_mensagem(usuario_id, texto, tipo)
+    
+    async def adicionar_mensagem_e_obter_contexto(self, usuario_id: str, texto: str, tipo: str = "text") -> str:
+        """
+        Adiciona a mensagem e devolve o contexto da conversa em uma única chamada.
         
-        logger.debug(f"Mensagem adicionada para {usuario_id}: {texto[:50]}...")
+        Equivale a `adicionar_mensagem` seguido de `obter_contexto`, mas usa a
+        sessão já localizada em vez de buscá-la novamente. O contexto não inclui
+        a mensagem recém-adicionada (ela é a pergunta atual).
+        """
+        return self._registrar_mensagem(usuario_id, texto, tipo).obter_contexto_formatado()
     
     async def adicionar_resposta_bot(self, usuario_id: str, resposta: str) -> None:
         """Adiciona a resposta do bot à última mensagem do usuário"""
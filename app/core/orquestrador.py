@@ -1,472 +1,912 @@
+# app/core/orquestrador.py
+"""
+Orquestrador das consultas do usuário.
+
+Coordena o fluxo completo de uma pergunta: identificação da intenção,
+construção da query a partir de `ESPECIFICACOES_INTENCOES`, execução no
+banco e sumarização dos resultados.
+
+Versão 3.0: Manipuladores individuais substituídos por uma tabela de
+especificações. Este é o único módulo orquestrador do projeto.
+"""
+
+import asyncio
 import logging
-from typing import Any, Dict, Awaitable, Callable
+import os
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, Awaitable, Callable, List, Mapping, NamedTuple, Optional, Tuple, Union
 
 # CORREÇÃO: Importação atualizada para langchain-ollama
 from langchain_ollama import OllamaLLM
 
-from app.agentes.agente_roteador import obter_intencao
-from app.agentes.agente_sumarizador import sumarizar_resultados
+from app.agentes.agente_roteador import Entidades, obter_intencao_em_cache
+from app.agentes import agente_sumarizador
+from app.agentes.agente_sumarizador import sumarizar_resultados, sumarizar_resultados_em_partes
 from app.ferramentas import ferramentas_sql
-from app.ferramentas.ferramentas_sql import ResultadoQuery
+from app.ferramentas.ferramentas_sql import ClientePorNome, ReferenciaCliente, ResultadoQuery
 from app.db.consultas import executar_consulta_selecao, encontrar_clientes_por_nome_ou_codigo
 
 logger = logging.getLogger(__name__)
 
-TipoManipuladorIntencao = Callable[[Dict[str, Any]], Awaitable[ResultadoQuery]]
+# Respostas fixas para intenções que não consultam o banco de dados
+RESPOSTA_DESCONHECIDO = (
+    "Desculpe, não entendi sua solicitação. Você pode perguntar sobre:\n"
+    "• Produtos mais vendidos\n"
+    "• Informações de clientes\n"
+    "• Status de pedidos\n"
+    "• Limites de crédito"
+)
+RESPOSTA_ESCLARECIMENTO_PADRAO = "Por favor, forneça mais detalhes para sua consulta."
+
+# Respostas fixas para falhas e consultas sem resultado
+RESPOSTA_ERRO_INTERNO = (
+    "Desculpe, ocorreu um erro interno ao processar sua solicitação. "
+    "Nossa equipe foi notificada e estamos trabalhando para resolver."
+)
+RESPOSTA_ERRO_BANCO = "Desculpe, ocorreu um erro ao consultar a base de dados. Por favor, tente novamente."
+RESPOSTA_SEM_RESULTADO = (
+    "Não encontrei nenhum resultado para sua consulta. "
+    "Verifique se os dados estão corretos ou tente com outros parâmetros."
+)
+
+def _ler_timeout(variavel: str, padrao: str) -> Optional[float]:
+    """
+    Lê um timeout (segundos) do ambiente; zero ou negativo desativa o limite.
+    
+    Valores não numéricos são registrados e substituídos pelo padrão, para que
+    um erro de configuração não impeça a aplicação de iniciar.
+    """
+    texto = os.getenv(variavel, padrao)
+    try:
+        valor = float(texto)
+    except ValueError:
+        logger.warning("Valor inválido para %s (%r); usando o padrão %s.", variavel, texto, padrao)
+        valor = float(padrao)
+    return valor if valor > 0 else None
+
+# Tempo máximo (segundos) de cada fase; ao estourar, a fase é cancelada e o
+# usuário recebe a resposta correspondente em vez de aguardar indefinidamente.
+# Os padrões cobrem a latência normal de um modelo local no Ollama e de buscas
+# LIKE no Oracle; servem apenas para cortar travamentos. O limite do banco fica
+# acima do `DB_CALL_TIMEOUT_MS` de `app.db.consultas`, para que o próprio
+# driver interrompa a query e libere a thread e a conexão antes.
+TIMEOUT_INTENCAO_SEGUNDOS = _ler_timeout("ORQ_TIMEOUT_INTENCAO", "60")
+TIMEOUT_BANCO_SEGUNDOS = _ler_timeout("ORQ_TIMEOUT_BANCO", "35")
+TIMEOUT_SUMARIZACAO_SEGUNDOS = _ler_timeout("ORQ_TIMEOUT_SUMARIZACAO", "90")
+
+RESPOSTA_TIMEOUT_INTENCAO = (
+    "Desculpe, demorei demais para entender sua pergunta. Por favor, tente novamente em instantes."
+)
+RESPOSTA_TIMEOUT_BANCO = (
+    "Desculpe, a consulta à base de dados demorou mais do que o esperado. "
+    "Tente novamente ou refine os filtros (ex: um período menor)."
+)
+RESPOSTA_TIMEOUT_SUMARIZACAO = (
+    "Encontrei os dados, mas demorei demais para montar a resposta. Por favor, tente novamente."
+)
+# Acrescentado ao texto já enviado quando o streaming excede o prazo
+AVISO_TIMEOUT_SUMARIZACAO_PARCIAL = (
+    "\n\n⚠️ A resposta foi interrompida por demorar mais do que o esperado. Por favor, tente novamente."
+)
+
+# Cache LRU de nomes de clientes já resolvidos: nome normalizado -> (expira_em, codcli)
+TTL_CACHE_CLIENTES_SEGUNDOS = 300
+MAX_CACHE_CLIENTES = 1024
+_cache_clientes: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+# Cache LRU dos registros retornados pelo banco: (intenção, argumentos da query)
+# -> (expira_em, registros). Guarda apenas os dados, nunca o texto sumarizado:
+# a sumarização recebe a pergunta com o histórico de cada usuário e é refeita
+# a cada consulta. O TTL curto limita a defasagem de períodos como "este mês".
+TTL_CACHE_DADOS_SEGUNDOS = 120
+MAX_CACHE_DADOS = 256
+_cache_dados: "OrderedDict[ChaveDados, Tuple[float, Tuple[Mapping[str, Any], ...]]]" = OrderedDict()
+
+# Buscas por nome em andamento, compartilhadas entre consultas simultâneas
+# que citam o mesmo cliente: nome normalizado -> task da busca no banco
+_buscas_clientes_em_andamento: Dict[str, "asyncio.Task[ResolucaoCliente]"] = {}
+# Quantidade de consultas aguardando cada busca; a última a desistir a cancela
+_interessados_buscas: Dict["asyncio.Task[ResolucaoCliente]", int] = {}
+
+# Opções listadas quando a busca por nome encontra vários clientes
+LIMITE_OPCOES_AMBIGUIDADE = 5
+
+# Nome de cliente citado no texto (ex: "cliente João Silva"), usado para
+# adiantar a busca no banco enquanto o LLM classifica a intenção
+_PADRAO_NOME_CLIENTE = re.compile(
+    r"\bcliente[ \t]+([A-ZÀ-Ý][\wÀ-ÿ]*(?:[ \t]+(?:d[aeo]s?[ \t]+)?[A-ZÀ-Ý][\wÀ-ÿ]*)*)"
+)
+
+# Termos das intenções que resolvem o cliente; sem eles a busca não é adiantada
+_PADRAO_ASSUNTO_CLIENTE = re.compile(
+    r"\b(?:limite|cr[ée]dito|status|situa[çc][ãa]o|bloque|ativ[oa]|contato|telefone|e-?mail"
+    r"|endere[çc]o|pedidos|compras|vendas|hist[óo]rico)",
+    re.IGNORECASE,
+)
+
+@dataclass(frozen=True)
+class ResolucaoErro:
+    """
+    Falha esperada ao resolver o cliente (ausente, não encontrado ou ambíguo).
+    
+    Devolvida no lugar de uma exceção, pois esses casos são comuns em conversas
+    e não justificam o custo de montar um traceback a cada mensagem.
+    
+    Attributes:
+        mensagem: Mensagem a ser exibida ao usuário.
+    """
+    mensagem: str
+
+ResolucaoCliente = Union[int, ResolucaoErro]
 
-# --- Funções Auxiliares ---
+ChaveDados = Tuple[str, Tuple[Tuple[str, Any], ...]]
 
-async def _resolver_cliente(entidades: Dict[str, Any]) -> int:
+class DadosConsulta(NamedTuple):
     """
-    Resolve o código do cliente a partir do nome ou código fornecido.
+    Resultado das fases que antecedem a sumarização.
     
-    Args:
-        entidades: Dicionário contendo as entidades extraídas da pergunta do usuário.
-        
-    Returns:
-        int: Código do cliente encontrado no banco de dados.
-        
-    Raises:
-        ValueError: Se nenhum cliente for encontrado ou houver ambiguidade na busca.
-        
-    Examples:
-        >>> entidades = {"nome_cliente": "João Silva"}
-        >>> codigo = await _resolver_cliente(entidades)
-        >>> print(codigo)  # 12345
-        
-        >>> entidades = {"codigo_cliente": 123}
-        >>> codigo = await _resolver_cliente(entidades)
-        >>> print(codigo)  # 123
+    Attributes:
+        resposta_imediata: Resposta pronta quando a consulta termina sem o
+            sumarizador (erro, ausência de dados ou formatador).
+        dados: Registros a serem sumarizados (do banco ou do cache de dados).
     """
-    codigo_cliente = entidades.get("codigo_cliente")
-    nome_cliente = entidades.get("nome_cliente")
+    resposta_imediata: Optional[str]
+    dados: List[Dict[str, Any]]
 
-    if codigo_cliente:
-        return int(codigo_cliente)
+MENSAGEM_CLIENTE_AUSENTE = "Para esta consulta, por favor, informe o nome ou o código do cliente."
 
-    if nome_cliente:
-        resultados_cliente = await encontrar_clientes_por_nome_ou_codigo(nome=nome_cliente)
-        if resultados_cliente.get("erro") or not resultados_cliente.get("dados"):
-            raise ValueError(f"Nenhum cliente encontrado com o nome '{nome_cliente}'.")
-        if len(resultados_cliente["dados"]) > 1:
-            opcoes = "\n".join([f"- Código: {c['codcli']}, Nome: {c['cliente']}" for c in resultados_cliente["dados"]])
-            raise ValueError(f"Encontrei mais de um cliente. Por favor, especifique qual deles você deseja:\n{opcoes}")
-        return resultados_cliente["dados"][0]['codcli']
+# Resolução de cliente iniciada especulativamente para a consulta atual
+_resolucao_especulativa: ContextVar[Optional[Tuple[str, "asyncio.Task[ResolucaoCliente]"]]] = ContextVar(
+    "resolucao_especulativa", default=None
+)
 
-    raise ValueError("Para esta consulta, por favor, informe o nome ou o código do cliente.")
+# --- Funções Auxiliares ---
 
-# --- Manipuladores de Intenção ---
+def limpar_cache_clientes() -> None:
+    """
+    Remove todos os códigos de cliente memorizados por `_resolver_codigo_por_nome`.
 
-async def _manipular_produtos_classificados(entidades: Dict[str, Any]) -> ResultadoQuery:
+    Útil quando o cadastro de clientes é alterado e a resolução deve
+    voltar a consultar o banco de dados imediatamente.
     """
-    Constrói query para buscar produtos classificados por critério de vendas.
-    
-    Args:
-        entidades: Dicionário com criterio_classificacao, periodo_tempo e limite.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-        
-    Examples:
-        >>> entidades = {
-        ...     "criterio_classificacao": "mais_vendidos", 
-        ...     "periodo_tempo": "este_mes", 
-        ...     "limite": 5
-        ... }
-        >>> sql, params = await _manipular_produtos_classificados(entidades)
-        >>> print(type(sql))
-        <class 'str'>
+    _cache_clientes.clear()
+
+def limpar_cache_dados() -> None:
+    """Remove todos os registros memorizados por `_memorizar_dados`."""
+    _cache_dados.clear()
+
+def _chave_dados(intencao: str, argumentos: Dict[str, Any]) -> ChaveDados:
     """
-    criterio = entidades.get("criterio_classificacao")
-    if not criterio:
-        raise ValueError("Critério de classificação não especificado (ex: mais vendidos).")
+    Monta a chave canônica de uma consulta a partir dos argumentos da query.
     
-    periodo = entidades.get("periodo_tempo")
-    if not periodo:
-        periodo = "este_mes"
-        logger.warning(f"Período não especificado, usando padrão: {periodo}")
-    
-    return ferramentas_sql.construir_query_produtos_classificados(
-        criterio_classificacao=criterio,
-        periodo_tempo=periodo,
-        limite=entidades.get("limite", 10)
-    )
+    Usa os argumentos já validados (com os padrões aplicados), para que
+    "mais vendidos" e "mais vendidos este mês" compartilhem a mesma chave.
+    """
+    return intencao, tuple(sorted(
+        (nome, " ".join(valor.casefold().split()) if isinstance(valor, str) else valor)
+        for nome, valor in argumentos.items()
+    ))
 
-async def _manipular_registros_vendas(entidades: Dict[str, Any]) -> ResultadoQuery:
+def _obter_dados_em_cache(chave: ChaveDados) -> Optional[List[Dict[str, Any]]]:
     """
-    Constrói query para listar registros de vendas de um cliente.
+    Retorna cópias dos registros memorizados para a chave, se ainda válidos.
+    
+    Cada chamada recebe dicionários novos, para que alterações feitas por quem
+    consome os dados não contaminem o cache.
+    """
+    entrada = _cache_dados.get(chave)
+    if entrada is None:
+        return None
+    if entrada[0] <= time.monotonic():
+        del _cache_dados[chave]
+        return None
+    _cache_dados.move_to_end(chave)
+    return [dict(registro) for registro in entrada[1]]
+
+def _memorizar_dados(chave: ChaveDados, dados: List[Dict[str, Any]]) -> None:
+    """Memoriza uma cópia somente leitura dos registros retornados pelo banco."""
+    registros = tuple(MappingProxyType(dict(registro)) for registro in dados)
+    _cache_dados[chave] = (time.monotonic() + TTL_CACHE_DADOS_SEGUNDOS, registros)
+    _cache_dados.move_to_end(chave)
+    if len(_cache_dados) > MAX_CACHE_DADOS:
+        _cache_dados.popitem(last=False)
+
+def _normalizar_nome_cliente(nome_cliente: str) -> str:
+    """Normaliza o nome do cliente para comparação e uso como chave de cache."""
+    return " ".join(nome_cliente.casefold().split())
+
+def _extrair_indicio_cliente(pergunta: str) -> Optional[str]:
+    """
+    Extrai de forma heurística o nome de cliente citado na pergunta atual.
+    
+    Só devolve um nome quando a pergunta também trata de um assunto de
+    cliente (limite, status, contato, endereço, pedidos...), para que a busca
+    especulativa não ocupe o banco em perguntas sobre produtos.
     
     Args:
-        entidades: Dicionário com nome_cliente/codigo_cliente, periodo_tempo e limite.
+        pergunta: Pergunta atual do usuário, sem o histórico da conversa.
         
     Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        Optional[str]: Último nome encontrado após a palavra "cliente" ou None.
         
     Examples:
-        >>> entidades = {"nome_cliente": "João", "periodo_tempo": "este_mes"}
-        >>> sql, params = await _manipular_registros_vendas(entidades)
-        >>> print("cliente" in str(sql).lower())
+        >>> _extrair_indicio_cliente("pedidos do cliente João Silva este mês")
+        'João Silva'
+        >>> _extrair_indicio_cliente("produtos que o cliente João Silva gosta") is None
         True
     """
-    codigo_cliente = await _resolver_cliente(entidades)
-    periodo = entidades.get("periodo_tempo", "este_mes")
+    if not _PADRAO_ASSUNTO_CLIENTE.search(pergunta):
+        return None
+    ocorrencias = _PADRAO_NOME_CLIENTE.findall(pergunta)
+    return ocorrencias[-1] if ocorrencias else None
+
+def _obter_cliente_em_cache(nome_cliente: str) -> Optional[int]:
+    """Retorna o código memorizado para o nome, se ainda estiver válido."""
+    chave = _normalizar_nome_cliente(nome_cliente)
+    entrada = _cache_clientes.get(chave)
+    if entrada is None:
+        return None
+    if entrada[0] <= time.monotonic():
+        del _cache_clientes[chave]
+        return None
+    _cache_clientes.move_to_end(chave)
+    return entrada[1]
+
+def _memorizar_cliente(nome_cliente: str, codigo_cliente: int) -> None:
+    """Memoriza o código de um cliente encontrado de forma única pelo nome."""
+    chave = _normalizar_nome_cliente(nome_cliente)
+    _cache_clientes[chave] = (time.monotonic() + TTL_CACHE_CLIENTES_SEGUNDOS, codigo_cliente)
+    _cache_clientes.move_to_end(chave)
+    if len(_cache_clientes) > MAX_CACHE_CLIENTES:
+        _cache_clientes.popitem(last=False)
+
+def _mensagem_clientes_ambiguos(clientes: List[Dict[str, Any]]) -> str:
+    """
+    Monta a mensagem pedindo que o usuário escolha entre os clientes encontrados.
     
-    return ferramentas_sql.construir_query_registros_vendas(
-        codigo_cliente=codigo_cliente,
-        periodo_tempo=periodo,
-        limite=entidades.get("limite", 50)
+    Lista no máximo `LIMITE_OPCOES_AMBIGUIDADE` clientes distintos, para que
+    buscas muito amplas não gerem mensagens longas demais no WhatsApp. As
+    buscas são limitadas, então o total real é desconhecido: havendo clientes
+    além dos listados, apenas avisa que há mais, sem informar quantos.
+    """
+    distintos = list({c['codcli']: c for c in clientes}.values())
+    opcoes = "\n".join(
+        f"- Código: {c['codcli']}, Nome: {c['cliente']}" for c in distintos[:LIMITE_OPCOES_AMBIGUIDADE]
     )
+    if len(distintos) > LIMITE_OPCOES_AMBIGUIDADE:
+        opcoes += "\n... e há mais clientes com esse nome; informe o código."
+    return f"Encontrei mais de um cliente. Por favor, especifique qual deles você deseja:\n{opcoes}"
 
-async def _manipular_detalhes_produto(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para buscar detalhes de um produto.
-    
-    Args:
-        entidades: Dicionário com nome_produto.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-        
-    Examples:
-        >>> entidades = {"nome_produto": "Parafuso"}
-        >>> sql, params = await _manipular_detalhes_produto(entidades)
-        >>> print("produto" in str(sql).lower())
-        True
-    """
-    nome_produto = entidades.get("nome_produto")
-    if not nome_produto:
-        raise ValueError("Por favor, especifique o nome do produto.")
-    return ferramentas_sql.construir_query_detalhes_produto(nome_produto=nome_produto)
+def _descartar_resultado_especulativo(task: "asyncio.Task[ResolucaoCliente]") -> None:
+    """Consome a exceção de uma resolução especulativa que não foi aproveitada."""
+    if not task.cancelled():
+        task.exception()
 
-async def _manipular_itens_pedido(entidades: Dict[str, Any]) -> ResultadoQuery:
+async def _resolver_codigo_por_nome(nome_cliente: str) -> ResolucaoCliente:
     """
-    Constrói query para obter itens de um pedido.
+    Resolve o código de um cliente pelo nome, com cache de curta duração.
+    
+    Apenas resultados com um único cliente são memorizados; ausência de
+    resultados e ambiguidade sempre consultam o banco novamente. Consultas
+    simultâneas pelo mesmo nome compartilham uma única busca no banco.
     
     Args:
-        entidades: Dicionário com id_pedido.
+        nome_cliente: Nome (ou parte do nome) do cliente.
         
     Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-        
-    Examples:
-        >>> entidades = {"id_pedido": 12345}
-        >>> sql, params = await _manipular_itens_pedido(entidades)
-        >>> print(params["id_pedido"])
-        12345
+        ResolucaoCliente: Código do cliente encontrado, ou `ResolucaoErro` se
+        nenhum cliente for encontrado ou houver ambiguidade na busca.
     """
-    id_pedido = entidades.get("id_pedido")
-    if not id_pedido:
-        raise ValueError("Por favor, informe o número do pedido.")
-    return ferramentas_sql.construir_query_itens_pedido(id_pedido=int(id_pedido))
+    codigo_em_cache = _obter_cliente_em_cache(nome_cliente)
+    if codigo_em_cache is not None:
+        logger.debug("Cliente '%s' resolvido via cache: %s", nome_cliente, codigo_em_cache)
+        return codigo_em_cache
+    
+    chave = _normalizar_nome_cliente(nome_cliente)
+    busca = _buscas_clientes_em_andamento.get(chave)
+    if busca is None:
+        busca = asyncio.create_task(_buscar_codigo_por_nome(nome_cliente))
+        _buscas_clientes_em_andamento[chave] = busca
+        busca.add_done_callback(lambda tarefa: _finalizar_busca_cliente(chave, tarefa))
+    else:
+        logger.debug("Aguardando busca em andamento pelo cliente '%s'.", nome_cliente)
+    
+    # shield: o cancelamento de um dos interessados não cancela a busca dos
+    # demais; quando todos desistem, a busca é cancelada para liberar o banco
+    _interessados_buscas[busca] = _interessados_buscas.get(busca, 0) + 1
+    try:
+        return await asyncio.shield(busca)
+    finally:
+        restantes = _interessados_buscas.pop(busca) - 1
+        if restantes:
+            _interessados_buscas[busca] = restantes
+        elif not busca.done():
+            logger.debug("Busca pelo cliente '%s' cancelada: nenhuma consulta aguarda o resultado.", nome_cliente)
+            busca.cancel()
+
+def _finalizar_busca_cliente(chave: str, tarefa: "asyncio.Task[ResolucaoCliente]") -> None:
+    """Remove a busca concluída do registro de buscas em andamento."""
+    if _buscas_clientes_em_andamento.get(chave) is tarefa:
+        del _buscas_clientes_em_andamento[chave]
+    _descartar_resultado_especulativo(tarefa)
+
+async def _buscar_codigo_por_nome(nome_cliente: str) -> ResolucaoCliente:
+    """Busca o cliente pelo nome no banco e memoriza o código se for único."""
+    # Uma única busca distingue nenhum, um ou vários clientes e já traz as
+    # opções; a linha extra indica que há mais clientes além das listadas.
+    resultados_cliente = await encontrar_clientes_por_nome_ou_codigo(
+        nome=nome_cliente, limite=LIMITE_OPCOES_AMBIGUIDADE + 1
+    )
+    dados = resultados_cliente.get("dados")
+    if resultados_cliente.get("erro") or not dados:
+        return ResolucaoErro(f"Nenhum cliente encontrado com o nome '{nome_cliente}'.")
+    if len(dados) > 1:
+        return ResolucaoErro(_mensagem_clientes_ambiguos(dados))
+    
+    codigo_cliente = dados[0]['codcli']
+    _memorizar_cliente(nome_cliente, codigo_cliente)
+    return codigo_cliente
 
-async def _manipular_limite_credito(entidades: Dict[str, Any]) -> ResultadoQuery:
+async def _resolver_cliente(entidades: Entidades) -> ResolucaoCliente:
     """
-    Constrói query para consultar limite de crédito de um cliente.
+    Resolve o código do cliente a partir do nome ou código fornecido.
     
     Args:
-        entidades: Dicionário com nome_cliente ou codigo_cliente.
+        entidades: Entidades extraídas da pergunta do usuário.
         
     Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        ResolucaoCliente: Código do cliente encontrado no banco de dados, ou
+        `ResolucaoErro` se o cliente não for informado, não for encontrado ou
+        houver ambiguidade na busca.
         
     Examples:
-        >>> entidades = {"codigo_cliente": 123}
-        >>> sql, params = await _manipular_limite_credito(entidades)
-        >>> print(params["codigo_cliente"])
-        123
-    """
-    codigo_cliente = await _resolver_cliente(entidades)
-    return ferramentas_sql.construir_query_limite_credito(codigo_cliente)
-
-async def _manipular_status_cliente(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para verificar status de bloqueio de um cliente.
-    
-    Args:
-        entidades: Dicionário com nome_cliente ou codigo_cliente.
+        >>> entidades = Entidades(nome_cliente="João Silva")
+        >>> codigo = await _resolver_cliente(entidades)
+        >>> print(codigo)  # 12345
         
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        >>> entidades = Entidades(codigo_cliente=123)
+        >>> codigo = await _resolver_cliente(entidades)
+        >>> print(codigo)  # 123
     """
-    codigo_cliente = await _resolver_cliente(entidades)
-    return ferramentas_sql.construir_query_status_cliente(codigo_cliente)
+    codigo_cliente = entidades.codigo_cliente
+    nome_cliente = entidades.nome_cliente
 
-async def _manipular_contato_cliente(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para buscar dados de contato de um cliente.
-    
-    Args:
-        entidades: Dicionário com nome_cliente ou codigo_cliente.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-    """
-    codigo_cliente = await _resolver_cliente(entidades)
-    return ferramentas_sql.construir_query_contato_cliente(codigo_cliente)
+    if codigo_cliente is not None:
+        return codigo_cliente
 
-async def _manipular_endereco_cliente(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para buscar endereço de um cliente.
-    
-    Args:
-        entidades: Dicionário com nome_cliente ou codigo_cliente.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-    """
-    codigo_cliente = await _resolver_cliente(entidades)
-    return ferramentas_sql.construir_query_endereco_cliente(codigo_cliente)
+    if nome_cliente:
+        especulacao = _resolucao_especulativa.get()
+        if especulacao and especulacao[0] == _normalizar_nome_cliente(nome_cliente):
+            return await especulacao[1]
+        return await _resolver_codigo_por_nome(nome_cliente)
 
-async def _manipular_clientes_por_cidade(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para listar clientes de uma cidade.
-    
-    Args:
-        entidades: Dicionário com cidade e limite.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-    """
-    cidade = entidades.get("cidade")
-    if not cidade:
-        raise ValueError("Por favor, especifique a cidade.")
-    return ferramentas_sql.construir_query_clientes_por_cidade(cidade, entidades.get("limite", 20))
+    return ResolucaoErro(MENSAGEM_CLIENTE_AUSENTE)
 
-async def _manipular_clientes_recentes(entidades: Dict[str, Any]) -> ResultadoQuery:
+async def _referenciar_cliente(entidades: Entidades) -> Union[ReferenciaCliente, ResolucaoErro]:
     """
-    Constrói query para listar clientes cadastrados recentemente.
+    Obtém a referência ao cliente para consultas feitas diretamente na PCCLIENT.
     
-    Args:
-        entidades: Dicionário com periodo_tempo e limite.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-    """
-    periodo = entidades.get("periodo_tempo")
-    if not periodo or periodo == "sempre":
-        raise ValueError("Por favor, especifique um período de tempo específico (ex: 'este mês', 'hoje').")
-    return ferramentas_sql.construir_query_clientes_recentes(periodo, entidades.get("limite", 20))
-
-async def _manipular_produtos_por_marca(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para listar produtos de uma marca.
+    Diferente de `_resolver_cliente`, não consulta o banco só para descobrir o
+    código: se o nome ainda não foi resolvido (cache ou busca especulativa),
+    devolve um `ClientePorNome` para que a própria consulta filtre pelo nome.
     
     Args:
-        entidades: Dicionário com marca e limite.
+        entidades: Entidades extraídas da pergunta do usuário.
         
     Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        Union[ReferenciaCliente, ResolucaoErro]: Código do cliente ou
+        `ClientePorNome`; `ResolucaoErro` se nem nome nem código forem
+        informados (ou se a busca especulativa não encontrou o cliente).
     """
-    marca = entidades.get("marca")
-    if not marca:
-        raise ValueError("Por favor, especifique a marca do produto.")
-    return ferramentas_sql.construir_query_produtos_por_marca(marca, entidades.get("limite", 20))
+    codigo_cliente = entidades.codigo_cliente
+    nome_cliente = entidades.nome_cliente
 
-async def _manipular_produtos_descontinuados(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para listar produtos descontinuados.
-    
-    Args:
-        entidades: Dicionário com limite.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-    """
-    return ferramentas_sql.construir_query_produtos_descontinuados(entidades.get("limite", 20))
+    if codigo_cliente is not None:
+        return codigo_cliente
 
-async def _manipular_posicao_pedido(entidades: Dict[str, Any]) -> ResultadoQuery:
-    """
-    Constrói query para verificar posição/status de um pedido.
-    
-    Args:
-        entidades: Dicionário com id_pedido.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
-    """
-    id_pedido = entidades.get("id_pedido")
-    if not id_pedido:
-        raise ValueError("Por favor, informe o número do pedido.")
-    return ferramentas_sql.construir_query_posicao_pedido(int(id_pedido))
+    if nome_cliente:
+        especulacao = _resolucao_especulativa.get()
+        if especulacao and especulacao[0] == _normalizar_nome_cliente(nome_cliente):
+            return await especulacao[1]
+        codigo_em_cache = _obter_cliente_em_cache(nome_cliente)
+        if codigo_em_cache is not None:
+            return codigo_em_cache
+        return ClientePorNome(nome_cliente)
 
-async def _manipular_valor_pedido(entidades: Dict[str, Any]) -> ResultadoQuery:
+    return ResolucaoErro(MENSAGEM_CLIENTE_AUSENTE)
+
+def _validar_cliente_por_nome(nome_cliente: str, dados: List[Dict[str, Any]]) -> Optional[str]:
     """
-    Constrói query para consultar valor total de um pedido.
+    Verifica o resultado de uma consulta de cliente filtrada pelo nome.
     
     Args:
-        entidades: Dicionário com id_pedido.
+        nome_cliente: Nome informado pelo usuário.
+        dados: Registros retornados pela consulta (com 'codcli' e 'cliente').
         
     Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        Optional[str]: Mensagem de erro para o usuário, ou None se um único
+        cliente foi encontrado (nesse caso o código é memorizado).
     """
-    id_pedido = entidades.get("id_pedido")
-    if not id_pedido:
-        raise ValueError("Por favor, informe o número do pedido.")
-    return ferramentas_sql.construir_query_valor_pedido(int(id_pedido))
+    if not dados:
+        return f"❌ Nenhum cliente encontrado com o nome '{nome_cliente}'."
+
+    codigos = {registro["codcli"] for registro in dados}
+    if len(codigos) > 1:
+        return f"❌ {_mensagem_clientes_ambiguos(dados)}"
 
-async def _manipular_data_entrega_pedido(entidades: Dict[str, Any]) -> ResultadoQuery:
+    _memorizar_cliente(nome_cliente, dados[0]["codcli"])
+    return None
+
+# --- Especificação das Intenções ---
+
+class CampoEntidade(NamedTuple):
     """
-    Constrói query para consultar data de entrega de um pedido.
+    Descreve uma entidade repassada ao construtor de query.
     
-    Args:
-        entidades: Dicionário com id_pedido.
-        
-    Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+    Attributes:
+        nome: Nome da entidade extraída, igual ao parâmetro do construtor.
+        mensagem_obrigatorio: Se definida, a entidade é obrigatória e esta é a
+            mensagem exibida quando ela não for informada.
+        padrao: Valor usado quando a entidade opcional não for informada.
+        conversor: Função aplicada ao valor informado (pode validar e lançar ValueError).
     """
-    id_pedido = entidades.get("id_pedido")
-    if not id_pedido:
-        raise ValueError("Por favor, informe o número do pedido.")
-    return ferramentas_sql.construir_query_data_entrega_pedido(int(id_pedido))
+    nome: str
+    mensagem_obrigatorio: Optional[str] = None
+    padrao: Any = None
+    conversor: Optional[Callable[[Any], Any]] = None
 
-async def _manipular_pedidos_por_posicao(entidades: Dict[str, Any]) -> ResultadoQuery:
+class EspecificacaoIntencao(NamedTuple):
     """
-    Constrói query para listar pedidos com uma determinada posição/status.
+    Descreve como construir a query de uma intenção a partir das entidades.
+    
+    Attributes:
+        construtor: Função de `ferramentas_sql` que gera o SQL e os parâmetros.
+        campos: Entidades repassadas ao construtor, na ordem de validação.
+        resolver_cliente: Se definida, resolve o cliente (passado como
+            `codigo_cliente`) antes das demais entidades.
+        formatador: Se definido, responde a resultados de um único registro
+            com um texto fixo, dispensando a sumarização pelo LLM.
+    """
+    construtor: Callable[..., ResultadoQuery]
+    campos: Tuple[CampoEntidade, ...] = ()
+    resolver_cliente: Optional[Callable[[Entidades], Awaitable[Union[ReferenciaCliente, ResolucaoErro]]]] = None
+    formatador: Optional[Callable[[Dict[str, Any]], str]] = None
+
+MENSAGEM_PERIODO_ESPECIFICO = "Por favor, especifique um período de tempo específico (ex: 'este mês', 'hoje')."
+MENSAGEM_ID_PEDIDO = "Por favor, informe o número do pedido."
+
+def _exigir_periodo_especifico(periodo: Any) -> Any:
+    """Rejeita o período 'sempre' para consultas que exigem um período específico."""
+    if periodo == "sempre":
+        raise ValueError(MENSAGEM_PERIODO_ESPECIFICO)
+    return periodo
+
+_CAMPO_ID_PEDIDO = CampoEntidade("id_pedido", MENSAGEM_ID_PEDIDO)
+
+def _campo_limite(padrao: int) -> CampoEntidade:
+    """Cria o campo opcional `limite` com o valor padrão informado."""
+    return CampoEntidade("limite", padrao=padrao)
+
+# Mapeamento imutável de intenções para a especificação de suas queries
+ESPECIFICACOES_INTENCOES: Mapping[str, EspecificacaoIntencao] = MappingProxyType({
+    # Produtos
+    "buscar_produtos_classificados": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_produtos_classificados,
+        (
+            CampoEntidade("criterio_classificacao", "Critério de classificação não especificado (ex: mais vendidos)."),
+            CampoEntidade("periodo_tempo", padrao="este_mes"),
+            _campo_limite(10),
+        ),
+    ),
+    "buscar_detalhes_produto": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_detalhes_produto,
+        (CampoEntidade("nome_produto", "Por favor, especifique o nome do produto."),),
+    ),
+    "listar_produtos_por_marca": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_produtos_por_marca,
+        (CampoEntidade("marca", "Por favor, especifique a marca do produto."), _campo_limite(20)),
+    ),
+    "listar_produtos_descontinuados": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_produtos_descontinuados,
+        (_campo_limite(20),),
+    ),
+
+    # Clientes
+    "consultar_limite_credito": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_limite_credito, resolver_cliente=_referenciar_cliente,
+        formatador=agente_sumarizador.formatar_limite_credito,
+    ),
+    "verificar_status_cliente": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_status_cliente, resolver_cliente=_referenciar_cliente,
+        formatador=agente_sumarizador.formatar_status_cliente,
+    ),
+    "buscar_dados_contato_cliente": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_contato_cliente, resolver_cliente=_referenciar_cliente,
+    ),
+    "buscar_endereco_cliente": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_endereco_cliente, resolver_cliente=_referenciar_cliente,
+    ),
+    "listar_clientes_por_cidade": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_clientes_por_cidade,
+        (CampoEntidade("cidade", "Por favor, especifique a cidade."), _campo_limite(20)),
+    ),
+    "listar_clientes_recentes": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_clientes_recentes,
+        (
+            CampoEntidade("periodo_tempo", MENSAGEM_PERIODO_ESPECIFICO, conversor=_exigir_periodo_especifico),
+            _campo_limite(20),
+        ),
+    ),
+    "buscar_clientes_classificados": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_clientes_classificados,
+        (
+            CampoEntidade("criterio_classificacao", "Critério de classificação para clientes não especificado."),
+            CampoEntidade("periodo_tempo", padrao="este_mes"),
+            _campo_limite(10),
+        ),
+    ),
+
+    # Pedidos
+    "listar_registros_vendas": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_registros_vendas,
+        (CampoEntidade("periodo_tempo", padrao="este_mes"), _campo_limite(50)),
+        resolver_cliente=_resolver_cliente,
+    ),
+    "obter_itens_pedido": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_itens_pedido, (_CAMPO_ID_PEDIDO,),
+    ),
+    "verificar_posicao_pedido": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_posicao_pedido, (_CAMPO_ID_PEDIDO,),
+        formatador=agente_sumarizador.formatar_posicao_pedido,
+    ),
+    "consultar_valor_pedido": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_valor_pedido, (_CAMPO_ID_PEDIDO,),
+        formatador=agente_sumarizador.formatar_valor_pedido,
+    ),
+    "consultar_data_entrega_pedido": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_data_entrega_pedido, (_CAMPO_ID_PEDIDO,),
+        formatador=agente_sumarizador.formatar_data_entrega_pedido,
+    ),
+    "listar_pedidos_por_posicao": EspecificacaoIntencao(
+        ferramentas_sql.construir_query_pedidos_por_posicao,
+        (CampoEntidade("posicao", "Por favor, especifique a posição dos pedidos (ex: 'bloqueado')."), _campo_limite(20)),
+    ),
+})
+
+# Intenções que precisam resolver o cliente, pré-computadas a partir das especificações
+INTENCOES_COM_CLIENTE = frozenset(
+    intencao for intencao, especificacao in ESPECIFICACOES_INTENCOES.items()
+    if especificacao.resolver_cliente
+)
+
+# Intenções cujos registros podem ser reaproveitados entre usuários: apenas
+# leituras agregadas de catálogo e carteira, sem dados de um cliente ou pedido
+INTENCOES_DADOS_EM_CACHE = frozenset({
+    "buscar_produtos_classificados",
+    "buscar_detalhes_produto",
+    "listar_produtos_por_marca",
+    "listar_produtos_descontinuados",
+    "listar_clientes_por_cidade",
+    "listar_clientes_recentes",
+    "buscar_clientes_classificados",
+})
+
+def _validar_entidades(especificacao: EspecificacaoIntencao, entidades: Entidades) -> Dict[str, Any]:
+    """
+    Valida as entidades de acordo com a especificação e monta os argumentos.
+    
+    Executada antes de qualquer acesso ao banco (inclusive a resolução do
+    cliente), para que entradas incompletas sejam rejeitadas sem custo de I/O.
     
     Args:
-        entidades: Dicionário com posicao e limite.
+        especificacao: Especificação da intenção identificada.
+        entidades: Entidades extraídas da pergunta do usuário.
         
     Returns:
-        ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        Dict[str, Any]: Argumentos do construtor da query, exceto o cliente.
+        
+    Raises:
+        ValueError: Se uma entidade obrigatória estiver ausente ou for inválida.
+        
+    Examples:
+        >>> especificacao = ESPECIFICACOES_INTENCOES["obter_itens_pedido"]
+        >>> _validar_entidades(especificacao, Entidades(id_pedido=12345))
+        {'id_pedido': 12345}
     """
-    posicao = entidades.get("posicao")
-    if not posicao:
-        raise ValueError("Por favor, especifique a posição dos pedidos (ex: 'bloqueado').")
-    return ferramentas_sql.construir_query_pedidos_por_posicao(posicao, entidades.get("limite", 20))
+    argumentos: Dict[str, Any] = {}
+    
+    for campo in especificacao.campos:
+        valor = getattr(entidades, campo.nome)
+        if not valor:
+            if campo.mensagem_obrigatorio:
+                raise ValueError(campo.mensagem_obrigatorio)
+            logger.debug("Entidade '%s' não informada, usando padrão: %s", campo.nome, campo.padrao)
+            valor = campo.padrao
+        elif campo.conversor:
+            valor = campo.conversor(valor)
+        argumentos[campo.nome] = valor
+    
+    return argumentos
 
-async def _manipular_clientes_classificados(entidades: Dict[str, Any]) -> ResultadoQuery:
+def _construir_query_intencao(
+    especificacao: EspecificacaoIntencao,
+    argumentos: Dict[str, Any],
+    cliente: Optional[ReferenciaCliente] = None,
+) -> ResultadoQuery:
     """
-    Constrói query para buscar clientes classificados por critério de compras.
+    Constrói a query a partir dos argumentos já validados.
     
     Args:
-        entidades: Dicionário com criterio_classificacao, periodo_tempo e limite.
+        especificacao: Especificação da intenção identificada.
+        argumentos: Argumentos devolvidos por `_validar_entidades`.
+        cliente: Cliente já resolvido, para especificações com `resolver_cliente`.
         
     Returns:
         ResultadoQuery: Tupla com SQL e parâmetros para execução.
+        
+    Raises:
+        ValueError: Se o construtor rejeitar algum valor (ex: período inválido).
+        
+    Examples:
+        >>> especificacao = ESPECIFICACOES_INTENCOES["obter_itens_pedido"]
+        >>> sql, params = _construir_query_intencao(especificacao, {"id_pedido": 12345})
+        >>> print(params["id_pedido"])
+        12345
     """
-    criterio = entidades.get("criterio_classificacao")
-    if not criterio:
-        raise ValueError("Critério de classificação para clientes não especificado.")
-    
-    periodo = entidades.get("periodo_tempo")
-    if not periodo:
-        periodo = "este_mes"
-        logger.warning(f"Período não especificado para clientes classificados, usando: {periodo}")
-    
-    return ferramentas_sql.construir_query_clientes_classificados(
-        criterio_classificacao=criterio,
-        periodo_tempo=periodo,
-        limite=entidades.get("limite", 10)
-    )
+    if cliente is not None:
+        argumentos = {"codigo_cliente": cliente, **argumentos}
+    return especificacao.construtor(**argumentos)
 
-# Mapeamento de intenções para suas funções manipuladoras
-MAPEAMENTO_INTENCOES: Dict[str, TipoManipuladorIntencao] = {
-    "buscar_produtos_classificados": _manipular_produtos_classificados,
-    "listar_registros_vendas": _manipular_registros_vendas,
-    "buscar_detalhes_produto": _manipular_detalhes_produto,
-    "obter_itens_pedido": _manipular_itens_pedido,
-    "consultar_limite_credito": _manipular_limite_credito,
-    "verificar_status_cliente": _manipular_status_cliente,
-    "buscar_dados_contato_cliente": _manipular_contato_cliente,
-    "buscar_endereco_cliente": _manipular_endereco_cliente,
-    "listar_clientes_por_cidade": _manipular_clientes_por_cidade,
-    "listar_clientes_recentes": _manipular_clientes_recentes,
-    "listar_produtos_por_marca": _manipular_produtos_por_marca,
-    "listar_produtos_descontinuados": _manipular_produtos_descontinuados,
-    "verificar_posicao_pedido": _manipular_posicao_pedido,
-    "consultar_valor_pedido": _manipular_valor_pedido,
-    "consultar_data_entrega_pedido": _manipular_data_entrega_pedido,
-    "listar_pedidos_por_posicao": _manipular_pedidos_por_posicao,
-    "buscar_clientes_classificados": _manipular_clientes_classificados,
-}
-
-async def gerenciar_consulta_usuario(llm: OllamaLLM, texto_usuario: str) -> str:
+async def _obter_dados_consulta(
+    llm: OllamaLLM, texto_usuario: str, pergunta_atual: Optional[str] = None
+) -> DadosConsulta:
     """
-    Orquestra o processamento completo de uma consulta do usuário.
-    
-    Esta função coordena todo o fluxo: identificação de intenção,
-    construção de query, execução no banco e sumarização dos resultados.
+    Executa as fases que antecedem a sumarização: intenção, query e banco.
     
     Args:
         llm: Instância do modelo OllamaLLM para processamento de linguagem natural.
         texto_usuario: Pergunta ou comando do usuário em linguagem natural.
+        pergunta_atual: Apenas a mensagem atual, quando `texto_usuario` inclui
+            o histórico da conversa. Se omitida, usa `texto_usuario`.
         
     Returns:
-        str: Resposta formatada em linguagem natural para o usuário.
+        DadosConsulta: Resposta imediata (quando a consulta termina sem
+        precisar do sumarizador) ou os dados encontrados.
         
-    Examples:
-        >>> llm = OllamaLLM(model="llama3.1", base_url="http://localhost:11434")
-        >>> resposta = await gerenciar_consulta_usuario(llm, "quais os 5 produtos mais vendidos este mês?")
-        >>> print(type(resposta))
-        <class 'str'>
-        >>> print(len(resposta) > 0)
-        True
+    Raises:
+        Exception: Erros inesperados são propagados para o chamador. Fases que
+        excedem o timeout são canceladas e viram respostas imediatas.
     """
-    logger.info(f"--- INÍCIO DA ORQUESTRAÇÃO PARA: '{texto_usuario}' ---")
+    tarefa_cliente = None
+    token_especulacao = None
+    chave_dados = None
     try:
-        # Fase 1: Identificar intenção e extrair entidades
-        dados_intencao = await obter_intencao(llm, texto_usuario)
+        # Fase 1: Identificar intenção e extrair entidades. Se a pergunta atual
+        # cita um cliente pelo nome, a busca no banco roda em paralelo com o LLM.
+        pergunta = pergunta_atual if pergunta_atual is not None else texto_usuario
+        nome_indicado = _extrair_indicio_cliente(pergunta)
+        if nome_indicado:
+            tarefa_cliente = asyncio.create_task(_resolver_codigo_por_nome(nome_indicado))
+            tarefa_cliente.add_done_callback(_descartar_resultado_especulativo)
+
+        try:
+            dados_intencao = await asyncio.wait_for(
+                obter_intencao_em_cache(llm, texto_usuario, pergunta), TIMEOUT_INTENCAO_SEGUNDOS
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timeout de %ss ao identificar a intenção.", TIMEOUT_INTENCAO_SEGUNDOS)
+            return DadosConsulta(RESPOSTA_TIMEOUT_INTENCAO, [])
         intencao = dados_intencao.intencao
         entidades = dados_intencao.entidades
         
-        logger.info(f"Intenção identificada: {intencao}")
-        logger.debug(f"Entidades extraídas: {entidades}")
+        logger.info("Intenção identificada: %s", intencao)
+        logger.debug("Entidades extraídas: %s", entidades)
 
-        # Tratamento de casos especiais
+        # Tratamento de casos especiais: respondidos antes de qualquer acesso ao
+        # banco (a busca especulativa, se houver, é cancelada no bloco finally)
         if intencao == "desconhecido":
-            return ("Desculpe, não entendi sua solicitação. Você pode perguntar sobre:\n"
-                   "• Produtos mais vendidos\n"
-                   "• Informações de clientes\n"
-                   "• Status de pedidos\n"
-                   "• Limites de crédito")
+            return DadosConsulta(RESPOSTA_DESCONHECIDO, [])
             
         if intencao == "necessita_esclarecimento":
-            return dados_intencao.mensagem_esclarecimento or "Por favor, forneça mais detalhes para sua consulta."
-
-        # Fase 2: Obter manipulador apropriado
-        manipulador = MAPEAMENTO_INTENCOES.get(intencao)
-        if not manipulador:
-            logger.error(f"Nenhum manipulador definido para a intenção '{intencao}'.")
-            return f"Desculpe, ainda não consigo processar este tipo de consulta: {intencao}"
+            return DadosConsulta(dados_intencao.mensagem_esclarecimento or RESPOSTA_ESCLARECIMENTO_PADRAO, [])
+
+        if tarefa_cliente:
+            nome_extraido = entidades.nome_cliente
+            if (intencao in INTENCOES_COM_CLIENTE and nome_extraido
+                    and _normalizar_nome_cliente(nome_extraido) == _normalizar_nome_cliente(nome_indicado)):
+                token_especulacao = _resolucao_especulativa.set(
+                    (_normalizar_nome_cliente(nome_indicado), tarefa_cliente)
+                )
+            else:
+                tarefa_cliente.cancel()
+
+        # Fase 2: Obter especificação da intenção
+        especificacao = ESPECIFICACOES_INTENCOES.get(intencao)
+        if not especificacao:
+            logger.error("Nenhuma especificação definida para a intenção '%s'.", intencao)
+            return DadosConsulta(f"Desculpe, ainda não consigo processar este tipo de consulta: {intencao}", [])
 
         # Fase 3: Construir query SQL
-        logger.info(f"Executando manipulador para intenção: {intencao}")
+        logger.info("Construindo query para intenção: %s", intencao)
         try:
-            query_sql, params = await manipulador(entidades)
+            argumentos = _validar_entidades(especificacao, entidades)
+            if intencao in INTENCOES_DADOS_EM_CACHE:
+                chave_dados = _chave_dados(intencao, argumentos)
+                dados_em_cache = _obter_dados_em_cache(chave_dados)
+                if dados_em_cache is not None:
+                    # Apenas o banco é dispensado; a sumarização é refeita
+                    logger.info("Dados obtidos do cache para a intenção: %s", intencao)
+                    return DadosConsulta(None, dados_em_cache)
+            cliente = None
+            if intencao in INTENCOES_COM_CLIENTE:
+                cliente = await asyncio.wait_for(
+                    especificacao.resolver_cliente(entidades), TIMEOUT_BANCO_SEGUNDOS
+                )
+                if isinstance(cliente, ResolucaoErro):
+                    logger.info("Cliente não resolvido: %s", cliente.mensagem)
+                    return DadosConsulta(f"❌ {cliente.mensagem}", [])
+            query_sql, params = _construir_query_intencao(especificacao, argumentos, cliente)
         except ValueError as ve:
-            logger.warning(f"Erro de validação ao construir query: {ve}")
-            return f"❌ {str(ve)}"
+            logger.warning("Erro de validação ao construir query: %s", ve)
+            return DadosConsulta(f"❌ {str(ve)}", [])
+        except asyncio.TimeoutError:
+            logger.warning("Timeout de %ss ao resolver o cliente.", TIMEOUT_BANCO_SEGUNDOS)
+            return DadosConsulta(RESPOSTA_TIMEOUT_BANCO, [])
         
-        logger.debug(f"Query SQL gerada: {query_sql}")
-        logger.debug(f"Parâmetros: {params}")
+        logger.debug("Query SQL gerada: %s", query_sql)
+        logger.debug("Parâmetros: %s", params)
 
         # Fase 4: Executar consulta no banco
-        resultado = await executar_consulta_selecao(query_sql, params)
+        try:
+            resultado = await asyncio.wait_for(
+                executar_consulta_selecao(query_sql, params), TIMEOUT_BANCO_SEGUNDOS
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timeout de %ss na consulta ao banco.", TIMEOUT_BANCO_SEGUNDOS)
+            return DadosConsulta(RESPOSTA_TIMEOUT_BANCO, [])
         
         if resultado.get("erro"):
-            logger.error(f"Erro na execução da consulta: {resultado['erro']}")
-            return "Desculpe, ocorreu um erro ao consultar a base de dados. Por favor, tente novamente."
+            logger.error("Erro na execução da consulta: %s", resultado['erro'])
+            return DadosConsulta(RESPOSTA_ERRO_BANCO, [])
 
         dados = resultado.get("dados", [])
         
+        # Consultas de cliente pelo nome resolvem o cliente na própria query
+        if "nome_cliente" in params:
+            erro_cliente = _validar_cliente_por_nome(entidades.nome_cliente or "", dados)
+            if erro_cliente:
+                return DadosConsulta(erro_cliente, [])
+
         if not dados:
             logger.info("Nenhum resultado encontrado para a consulta.")
-            return ("Não encontrei nenhum resultado para sua consulta. "
-                   "Verifique se os dados estão corretos ou tente com outros parâmetros.")
+            return DadosConsulta(RESPOSTA_SEM_RESULTADO, [])
+
+        logger.info("Consulta executada com sucesso. %s registros encontrados.", len(dados))
+
+        if chave_dados:
+            _memorizar_dados(chave_dados, dados)
+
+        # Resultados pontuais (um registro) são respondidos sem o LLM
+        if especificacao.formatador and len(dados) == 1:
+            logger.info("Resposta formatada diretamente para a intenção: %s", intencao)
+            return DadosConsulta(especificacao.formatador(dados[0]), [])
 
-        logger.info(f"Consulta executada com sucesso. {len(dados)} registros encontrados.")
+        return DadosConsulta(None, dados)
+
+    finally:
+        if tarefa_cliente and not tarefa_cliente.done():
+            tarefa_cliente.cancel()
+        if token_especulacao:
+            _resolucao_especulativa.reset(token_especulacao)
+
+async def gerenciar_consulta_usuario(
+    llm: OllamaLLM, texto_usuario: str, pergunta_atual: Optional[str] = None
+) -> str:
+    """
+    Orquestra o processamento completo de uma consulta do usuário.
+    
+    Esta função coordena todo o fluxo: identificação de intenção,
+    construção de query, execução no banco e sumarização dos resultados.
+    
+    Args:
+        llm: Instância do modelo OllamaLLM para processamento de linguagem natural.
+        texto_usuario: Pergunta ou comando do usuário em linguagem natural.
+        pergunta_atual: Apenas a mensagem atual, quando `texto_usuario` inclui
+            o histórico da conversa.
+        
+    Returns:
+        str: Resposta formatada em linguagem natural para o usuário.
+        
+    Examples:
+        >>> llm = OllamaLLM(model="llama3.1", base_url="http://localhost:11434")
+        >>> resposta = await gerenciar_consulta_usuario(llm, "quais os 5 produtos mais vendidos este mês?")
+        >>> print(type(resposta))
+        <class 'str'>
+        >>> print(len(resposta) > 0)
+        True
+    """
+    logger.info("--- INÍCIO DA ORQUESTRAÇÃO PARA: '%s' ---", texto_usuario)
+    try:
+        resposta_imediata, dados = await _obter_dados_consulta(llm, texto_usuario, pergunta_atual)
+        if resposta_imediata is not None:
+            return resposta_imediata
 
         # Fase 5: Sumarizar resultados
-        resposta_final = await sumarizar_resultados(
-            llm=llm,
-            pergunta=texto_usuario,
-            dados=dados
-        )
+        try:
+            resposta_final = await asyncio.wait_for(
+                sumarizar_resultados(llm=llm, pergunta=texto_usuario, dados=dados),
+                TIMEOUT_SUMARIZACAO_SEGUNDOS,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timeout de %ss na sumarização.", TIMEOUT_SUMARIZACAO_SEGUNDOS)
+            return RESPOSTA_TIMEOUT_SUMARIZACAO
 
         logger.info("Orquestração concluída com sucesso.")
         return resposta_final
 
     except Exception as e:
-        logger.error(f"Erro inesperado na orquestração: {e}", exc_info=True)
-        return ("Desculpe, ocorreu um erro interno ao processar sua solicitação. "
-                "Nossa equipe foi notificada e estamos trabalhando para resolver.")
\ No newline at end of file
+        logger.error("Erro inesperado na orquestração: %s", e, exc_info=True)
+        return RESPOSTA_ERRO_INTERNO
+
+async def gerenciar_consulta_usuario_em_partes(
+    llm: OllamaLLM, texto_usuario: str, pergunta_atual: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Versão em streaming de `gerenciar_consulta_usuario`.
+    
+    As fases de intenção, query e banco são as mesmas; a sumarização é
+    repassada trecho a trecho, à medida que o LLM gera o texto.
+    
+    Args:
+        llm: Instância do modelo OllamaLLM para processamento de linguagem natural.
+        texto_usuario: Pergunta ou comando do usuário em linguagem natural.
+        pergunta_atual: Apenas a mensagem atual, quando `texto_usuario` inclui
+            o histórico da conversa.
+        
+    Yields:
+        str: Trechos consecutivos da resposta para o usuário.
+        
+    Examples:
+        >>> partes = gerenciar_consulta_usuario_em_partes(llm, "status do cliente Ana")
+        >>> resposta = "".join([trecho async for trecho in partes])
+    """
+    logger.info("--- INÍCIO DA ORQUESTRAÇÃO (STREAMING) PARA: '%s' ---", texto_usuario)
+    try:
+        resposta_imediata, dados = await _obter_dados_consulta(llm, texto_usuario, pergunta_atual)
+    except Exception as e:
+        logger.error("Erro inesperado na orquestração: %s", e, exc_info=True)
+        yield RESPOSTA_ERRO_INTERNO
+        return
+
+    if resposta_imediata is not None:
+        yield resposta_imediata
+        return
+
+    # Fase 5: Sumarizar resultados (o sumarizador já trata as próprias falhas).
+    # O prazo vale para a resposta inteira, não para cada trecho.
+    partes = sumarizar_resultados_em_partes(llm, texto_usuario, dados)
+    loop = asyncio.get_running_loop()
+    prazo = None if TIMEOUT_SUMARIZACAO_SEGUNDOS is None else loop.time() + TIMEOUT_SUMARIZACAO_SEGUNDOS
+    algum_trecho_enviado = False
+    try:
+        while True:
+            restante = None if prazo is None else max(prazo - loop.time(), 0)
+            try:
+                trecho = await asyncio.wait_for(partes.__anext__(), restante)
+            except StopAsyncIteration:
+                break
+            algum_trecho_enviado = True
+            yield trecho
+    except asyncio.TimeoutError:
+        logger.warning("Timeout de %ss na sumarização (streaming).", TIMEOUT_SUMARIZACAO_SEGUNDOS)
+        yield AVISO_TIMEOUT_SUMARIZACAO_PARCIAL if algum_trecho_enviado else RESPOSTA_TIMEOUT_SUMARIZACAO
+        return
+    finally:
+        await partes.aclose()
+
+    logger.info("Orquestração concluída com sucesso.")
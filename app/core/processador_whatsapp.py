@@ -1,5 +1,16 @@
+import asyncio
 import logging
-from typing import Dict, Any
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+
+try:
+    from redis.asyncio import Redis
+except ImportError:  # Redis é opcional: sem ele a deduplicação fica restrita ao processo
+    Redis = None
 
 # CORREÇÃO: Importação atualizada para langchain-ollama
 from langchain_ollama import OllamaLLM
@@ -9,6 +20,78 @@ from app.core.cliente_waha import cliente_waha
 
 logger = logging.getLogger(__name__)
 
+# Limita os áudios baixados e transcritos ao mesmo tempo, para que uma rajada
+# de mensagens de voz não dispute CPU com o restante do processamento
+LIMITE_AUDIOS_SIMULTANEOS = os.cpu_count() or 2
+_semaforo_audios = asyncio.Semaphore(LIMITE_AUDIOS_SIMULTANEOS)
+
+# Respostas fixas para mídias sem texto: o bot só entende texto e áudio, então
+# essas mensagens são respondidas sem passar pelo contexto nem pelo LLM
+RESPOSTAS_MIDIA_SEM_TEXTO: Mapping[str, str] = MappingProxyType({
+    "image": "Recebi sua imagem, mas só consigo entender mensagens de texto ou áudio. Como posso ajudar?",
+    "video": "Recebi seu vídeo, mas só consigo entender mensagens de texto ou áudio. Como posso ajudar?",
+    "document": "Recebi seu documento, mas ainda não consigo ler arquivos. Envie sua pergunta por texto ou áudio.",
+    "location": "Recebi sua localização, mas só consigo entender mensagens de texto ou áudio. Como posso ajudar?",
+    "contact": "Recebi o contato, mas só consigo entender mensagens de texto ou áudio. Como posso ajudar?",
+})
+
+# Mídias cuja legenda, quando presente, é tratada como a pergunta do usuário
+TIPOS_MIDIA_COM_LEGENDA = frozenset({"image", "video"})
+
+def _resposta_midia_sem_texto(mensagem: "MensagemWebhook") -> Optional[str]:
+    """Retorna a resposta fixa para mídias sem texto aproveitável, ou None."""
+    resposta = RESPOSTAS_MIDIA_SEM_TEXTO.get(mensagem.tipo)
+    if resposta is None:
+        return None
+    if mensagem.tipo in TIPOS_MIDIA_COM_LEGENDA and mensagem.dados.get("caption"):
+        return None
+    return resposta
+
+@dataclass(slots=True, frozen=True)
+class MensagemWebhook:
+    """
+    Mensagem do WhatsApp extraída uma única vez do payload do webhook.
+    
+    Attributes:
+        chat_id: ID do chat de origem (ex: '5511999999999@c.us').
+        message_id: ID da mensagem, usado para evitar processamento duplicado.
+        tipo: Tipo da mensagem (text, ptt, image, ...).
+        dados: Dados brutos da mensagem, usados na extração de mídia e legendas.
+    """
+    chat_id: str
+    message_id: str
+    tipo: str
+    dados: Dict[str, Any]
+
+def extrair_mensagem_webhook(webhook_data: Dict[str, Any]) -> Optional[MensagemWebhook]:
+    """
+    Extrai a mensagem do payload de um webhook do WAHA.
+    
+    Args:
+        webhook_data: JSON recebido do webhook do WAHA.
+        
+    Returns:
+        Optional[MensagemWebhook]: A mensagem, ou None se o evento não for uma
+        mensagem ou se faltarem o remetente ou o ID.
+        
+    Examples:
+        >>> extrair_mensagem_webhook({"payload": {"event": "message", "data": {
+        ...     "from": "5511999999999@c.us", "id": "msg123", "body": "Olá"}}})
+        MensagemWebhook(chat_id='5511999999999@c.us', message_id='msg123', tipo='text', ...)
+    """
+    payload = webhook_data.get("payload")
+    if not isinstance(payload, dict) or payload.get("event") != "message":
+        return None
+    
+    dados = payload.get("data") or {}
+    chat_id = dados.get("from")
+    message_id = dados.get("id")
+    if not chat_id or not message_id:
+        logger.warning("Dados incompletos na mensagem")
+        return None
+    
+    return MensagemWebhook(chat_id, message_id, dados.get("type", "text"), dados)
+
 class ProcessadorWhatsApp:
     """
     Classe responsável por processar mensagens recebidas do WhatsApp.
@@ -21,28 +104,91 @@ class ProcessadorWhatsApp:
     3. Diferentes tipos de mídia sejam tratados adequadamente
     4. Respostas sejam enviadas de volta pelo WhatsApp
     
+    Com vários workers, a deduplicação local não basta: cada processo
+    receberia o mesmo reenvio do webhook. Se um cliente Redis for informado,
+    o registro de cada mensagem também é feito no Redis (SET NX com expiração),
+    e o registro local passa a servir apenas como cache à frente dele.
+    
     Attributes:
-        mensagens_processando: Set com IDs de mensagens sendo processadas para evitar duplicatas.
+        mensagens_processando: IDs de mensagens em processamento ou respondidas
+            recentemente, com o instante de registro, para evitar duplicatas.
     """
     
-    def __init__(self):
+    # Limites do registro de mensagens: tamanho máximo e tempo de retenção
+    MAX_MENSAGENS_REGISTRADAS = 4096
+    TTL_MENSAGENS_SEGUNDOS = 300.0
+    
+    def __init__(self, redis: Optional["Redis"] = None):
         """
         Inicializa o processador com controle de mensagens duplicadas.
         
+        Args:
+            redis: Cliente Redis compartilhado entre os workers (opcional).
+        
         Examples:
             >>> processador = ProcessadorWhatsApp()
             >>> len(processador.mensagens_processando)
             0
         """
-        self.mensagens_processando = set()
+        self.mensagens_processando: "OrderedDict[str, float]" = OrderedDict()
+        self._redis = redis
+    
+    async def _registrar_no_redis(self, message_id: str) -> bool:
+        """
+        Registra a mensagem no Redis, compartilhado entre os workers.
+        
+        Args:
+            message_id: ID da mensagem recebida.
+            
+        Returns:
+            bool: False se outro worker já registrou a mensagem. Falhas de
+            comunicação com o Redis não bloqueiam o processamento.
+        """
+        try:
+            return bool(await self._redis.set(
+                f"wa:msg:{message_id}", "1", nx=True, ex=int(self.TTL_MENSAGENS_SEGUNDOS)
+            ))
+        except Exception as e:
+            logger.warning("Falha ao registrar mensagem %s no Redis: %s", message_id, e)
+            return True
+    
+    async def _liberar_no_redis(self, message_id: str) -> None:
+        """Remove o registro da mensagem no Redis para que um reenvio seja processado."""
+        try:
+            await self._redis.delete(f"wa:msg:{message_id}")
+        except Exception as e:
+            logger.warning("Falha ao liberar mensagem %s no Redis: %s", message_id, e)
+    
+    async def encerrar(self) -> None:
+        """Fecha a conexão com o Redis, se houver."""
+        if self._redis is not None:
+            await self._redis.aclose()
+    
+    def _descartar_mensagens_expiradas(self, agora: float) -> None:
+        """
+        Remove do registro as mensagens expiradas ou excedentes.
+        
+        As entradas ficam em ordem de registro, então basta remover a partir
+        da mais antiga até encontrar uma ainda válida.
+        
+        Args:
+            agora: Instante atual (`time.monotonic()`).
+        """
+        limite_expiracao = agora - self.TTL_MENSAGENS_SEGUNDOS
+        registro = self.mensagens_processando
+        while registro:
+            registrada_em = next(iter(registro.values()))
+            if registrada_em >= limite_expiracao and len(registro) <= self.MAX_MENSAGENS_REGISTRADAS:
+                break
+            registro.popitem(last=False)
     
-    async def processar_mensagem(self, llm: OllamaLLM, webhook_data: Dict[str, Any]) -> bool:
+    async def processar_mensagem(self, llm: OllamaLLM, mensagem: MensagemWebhook) -> bool:
         """
         Processa mensagem recebida do WhatsApp via webhook.
         
         Args:
             llm: Instância do modelo OllamaLLM para processamento de linguagem natural.
-            webhook_data: Dados recebidos do webhook do WAHA contendo a mensagem.
+            mensagem: Mensagem extraída do webhook por `extrair_mensagem_webhook`.
             
         Returns:
             bool: True se a mensagem foi processada e respondida com sucesso.
@@ -60,68 +206,62 @@ class ProcessadorWhatsApp:
             ...         }
             ...     }
             ... }
-            >>> resultado = await processador.processar_mensagem(llm, webhook_data)
+            >>> mensagem = extrair_mensagem_webhook(webhook_data)
+            >>> resultado = await processador.processar_mensagem(llm, mensagem)
             >>> print(resultado)
             True
         """
+        chat_id = mensagem.chat_id
+        message_id = mensagem.message_id
+        message_type = mensagem.tipo
+        
         try:
-            # Extrair dados da mensagem
-            if "payload" not in webhook_data:
-                logger.warning("Webhook sem payload")
+            # Evitar processamento duplicado, inclusive de reenvios do webhook
+            # que cheguem depois de a mensagem já ter sido respondida
+            agora = time.monotonic()
+            self._descartar_mensagens_expiradas(agora)
+            if message_id in self.mensagens_processando:
+                logger.info("Mensagem %s já foi recebida e está sendo (ou foi) processada", message_id)
                 return False
             
-            payload = webhook_data["payload"]
+            self.mensagens_processando[message_id] = agora
             
-            # Verificar se é uma mensagem
-            if payload.get("event") != "message":
-                logger.debug(f"Evento ignorado: {payload.get('event')}")
+            if self._redis is not None and not await self._registrar_no_redis(message_id):
+                logger.info("Mensagem %s já foi recebida por outro worker", message_id)
                 return False
             
-            message_data = payload.get("data", {})
-            
-            # Extrair informações básicas
-            chat_id = message_data.get("from")
-            message_id = message_data.get("id")
-            message_type = message_data.get("type", "text")
-            
-            if not chat_id or not message_id:
-                logger.warning("Dados incompletos na mensagem")
-                return False
-            
-            # Evitar processamento duplicado
-            if message_id in self.mensagens_processando:
-                logger.info(f"Mensagem {message_id} já está sendo processada")
-                return False
-            
-            self.mensagens_processando.add(message_id)
+            sucesso = False
             
             try:
+                resposta_midia = _resposta_midia_sem_texto(mensagem)
+                if resposta_midia is not None:
+                    logger.info("Mídia %s sem texto recebida de %s; enviando resposta fixa", message_type, chat_id)
+                    sucesso = await cliente_waha.enviar_mensagem(chat_id, resposta_midia)
+                    return sucesso
+                
                 # Processar baseado no tipo de mensagem
-                texto_usuario = await self._extrair_texto_mensagem(message_data)
+                texto_usuario = await self._extrair_texto_mensagem(mensagem.dados)
                 
                 if not texto_usuario:
-                    logger.warning(f"Não foi possível extrair texto da mensagem tipo {message_type}")
+                    logger.warning("Não foi possível extrair texto da mensagem tipo %s", message_type)
                     return False
                 
-                # Enviar indicador de "digitando..."
-                await cliente_waha.enviar_typing(chat_id, 3)
+                # Enviar indicador de "digitando..." sem bloquear o processamento
+                cliente_waha.disparar_typing(chat_id, 3)
                 
-                # Adicionar ao contexto
-                await gerenciador_contexto.adicionar_mensagem(
+                # Adicionar ao contexto e obter o histórico anterior a esta mensagem
+                contexto = await gerenciador_contexto.adicionar_mensagem_e_obter_contexto(
                     usuario_id=chat_id,
                     texto=texto_usuario,
                     tipo=message_type
                 )
                 
-                # Obter contexto da conversa
-                contexto = await gerenciador_contexto.obter_contexto(chat_id)
-                
                 # Construir prompt com contexto
                 prompt_completo = f"{contexto}{texto_usuario}" if contexto else texto_usuario
                 
                 # Processar com a IA
-                logger.info(f"Processando mensagem de {chat_id}: {texto_usuario[:50]}...")
-                resposta = await gerenciar_consulta_usuario(llm, prompt_completo)
+                logger.info("Processando mensagem de %s: %.50s...", chat_id, texto_usuario)
+                resposta = await gerenciar_consulta_usuario(llm, prompt_completo, texto_usuario)
                 
                 # Adicionar resposta ao contexto
                 await gerenciador_contexto.adicionar_resposta_bot(chat_id, resposta)
@@ -130,18 +270,22 @@ class ProcessadorWhatsApp:
                 sucesso = await cliente_waha.enviar_mensagem(chat_id, resposta)
                 
                 if sucesso:
-                    logger.info(f"Resposta enviada com sucesso para {chat_id}")
+                    logger.info("Resposta enviada com sucesso para %s", chat_id)
                 else:
-                    logger.error(f"Falha ao enviar resposta para {chat_id}")
+                    logger.error("Falha ao enviar resposta para %s", chat_id)
                 
                 return sucesso
                 
             finally:
-                # Remover da lista de processamento
-                self.mensagens_processando.discard(message_id)
+                # Mensagens respondidas continuam registradas até expirar; as
+                # que falharam são liberadas para que um reenvio seja processado
+                if not sucesso:
+                    self.mensagens_processando.pop(message_id, None)
+                    if self._redis is not None:
+                        await self._liberar_no_redis(message_id)
             
         except Exception as e:
-            logger.error(f"Erro ao processar mensagem do WhatsApp: {e}", exc_info=True)
+            logger.error("Erro ao processar mensagem do WhatsApp: %s", e, exc_info=True)
             return False
     
     async def _extrair_texto_mensagem(self, message_data: Dict[str, Any]) -> str:
@@ -174,19 +318,20 @@ class ProcessadorWhatsApp:
             # Mensagem de voz
             logger.info("Processando mensagem de voz")
             
-            # Baixar áudio
-            filepath = await cliente_waha.baixar_audio(message_data)
-            if not filepath:
-                return "[Erro ao baixar áudio]"
-            
-            try:
-                # Transcrever áudio
-                transcricao = await cliente_waha.transcrever_audio(filepath)
-                return transcricao or "[Erro na transcrição do áudio]"
-            
-            finally:
-                # Limpar arquivo temporário
-                await cliente_waha.limpar_arquivo_temp(filepath)
+            async with _semaforo_audios:
+                # Baixar áudio
+                filepath = await cliente_waha.baixar_audio(message_data)
+                if not filepath:
+                    return "[Erro ao baixar áudio]"
+                
+                try:
+                    # Transcrever áudio
+                    transcricao = await cliente_waha.transcrever_audio(filepath)
+                    return transcricao or "[Erro na transcrição do áudio]"
+                
+                finally:
+                    # Limpar arquivo temporário sem atrasar a resposta
+                    cliente_waha.disparar_limpeza_arquivo_temp(filepath)
         
         elif message_type == "image":
             # Mensagem com imagem
@@ -214,5 +359,21 @@ class ProcessadorWhatsApp:
         else:
             return f"[Mensagem do tipo {message_type} recebida]"
 
+def _criar_cliente_redis() -> Optional["Redis"]:
+    """
+    Cria o cliente Redis a partir de REDIS_URL, se configurado.
+    
+    Returns:
+        Optional[Redis]: Cliente Redis, ou None se REDIS_URL não estiver
+        definida ou o pacote `redis` não estiver instalado.
+    """
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+    if Redis is None:
+        logger.warning("REDIS_URL definida, mas o pacote 'redis' não está instalado. Deduplicação apenas local.")
+        return None
+    return Redis.from_url(url)
+
 # Instância global do processador
-processador_whatsapp = ProcessadorWhatsApp()
\ No newline at end of file
+processador_whatsapp = ProcessadorWhatsApp(redis=_criar_cliente_redis())
\ No newline at end of file
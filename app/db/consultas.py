@@ -10,49 +10,295 @@ também foi ajustada para usar este novo padrão de retorno.
 
 import logging
 import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # (Assumindo que os helpers e dependências externas estão configurados corretamente)
 from helpers_compartilhados.helpers import adicionar_modulo
 adicionar_modulo('conexaodb')
-from DB_Oracle_Encrypted import testarConexao, conexao
+from DB_Oracle_Encrypted import conexao
 from esperanca_excecao_robos import ExcecaoRobo
 
 # Configura o logger para este módulo
 logger = logging.getLogger(__name__)
 
+def _ler_numero(variavel: str, padrao: str, tipo: type = int) -> Any:
+    """Lê um número do ambiente, usando o padrão (com aviso) se o valor for inválido."""
+    texto = os.getenv(variavel, padrao)
+    try:
+        return tipo(texto)
+    except ValueError:
+        logger.warning("Valor inválido para %s (%r); usando o padrão %s.", variavel, texto, padrao)
+        return tipo(padrao)
+
+# Limites do pool de conexões (por banco de dados)
+POOL_TAMANHO_MINIMO = _ler_numero("DB_POOL_MIN", "5")
+POOL_TAMANHO_MAXIMO = _ler_numero("DB_POOL_MAX", "25")
+POOL_TIMEOUT_AQUISICAO = _ler_numero("DB_POOL_TIMEOUT", "30", float)
+
+# Tamanho do cache de statements preparados de cada conexão. As queries de
+# `ferramentas_sql` formam um conjunto limitado de textos SQL, então o cache
+# do driver (indexado pelo texto) evita o parse repetido das mesmas queries.
+TAMANHO_CACHE_STATEMENTS = _ler_numero("DB_STMT_CACHE", "64")
+
+# Conexões ociosas por mais tempo que este intervalo (segundos) são verificadas
+# com `ping` antes de reutilizadas; as demais são entregues sem ida ao banco.
+INTERVALO_VERIFICACAO_CONEXAO = _ler_numero("DB_POOL_PING_INTERVALO", "60", float)
+
+# Tempo máximo (milissegundos) de cada ida ao banco, aplicado pelo próprio
+# driver (`call_timeout`). O timeout do orquestrador só abandona a espera:
+# sem este limite a query seguiria ocupando a thread e a conexão até o Oracle
+# responder. Zero desativa o limite.
+TEMPO_LIMITE_CHAMADA_MS = _ler_numero("DB_CALL_TIMEOUT_MS", "30000")
+
+
+class PoolConexoes:
+    """
+    Pool simples de conexões reutilizáveis para um banco de dados.
+
+    As conexões são criadas via `conexao(nome_bd)` e devolvidas ao pool ao
+    final de cada transação, evitando o custo de autenticação e criação de
+    sessão no Oracle a cada consulta. É seguro para uso a partir das threads
+    usadas por `asyncio.to_thread`.
+
+    Attributes:
+        nome_bd: Nome do banco de dados atendido pelo pool.
+        tamanho_minimo: Conexões criadas antecipadamente em `preencher`.
+        tamanho_maximo: Limite de conexões abertas simultaneamente.
+    """
+
+    def __init__(self, nome_bd: str, tamanho_minimo: int, tamanho_maximo: int):
+        self.nome_bd = nome_bd
+        self.tamanho_minimo = tamanho_minimo
+        self.tamanho_maximo = max(tamanho_maximo, 1)
+        # Conexões livres com o instante em que foram devolvidas
+        self._livres: "queue.LifoQueue[Tuple[Any, float]]" = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+
+    def _criar_conexao(self) -> Any:
+        """Abre uma nova conexão já configurada com o cache de statements e o limite de tempo."""
+        con = conexao(self.nome_bd)
+        if hasattr(con, "stmtcachesize"):
+            con.stmtcachesize = TAMANHO_CACHE_STATEMENTS
+        if TEMPO_LIMITE_CHAMADA_MS > 0 and hasattr(con, "call_timeout"):
+            con.call_timeout = TEMPO_LIMITE_CHAMADA_MS
+        return con
+
+    def preencher(self) -> None:
+        """Cria conexões até atingir o tamanho mínimo do pool."""
+        while True:
+            with self._lock:
+                if self._criadas >= self.tamanho_minimo:
+                    return
+                self._criadas += 1
+            try:
+                self._livres.put((self._criar_conexao(), time.monotonic()))
+            except Exception:
+                with self._lock:
+                    self._criadas -= 1
+                raise
+
+    def _conexao_ativa(self, con: Any, ociosa_desde: float) -> bool:
+        """Verifica com `ping` se uma conexão ociosa há muito tempo ainda responde."""
+        if time.monotonic() - ociosa_desde < INTERVALO_VERIFICACAO_CONEXAO:
+            return True
+        ping = getattr(con, "ping", None)
+        if ping is None:
+            return True
+        try:
+            ping()
+            return True
+        except Exception as e:
+            logger.warning("Conexão ociosa do banco '%s' descartada: %s", self.nome_bd, e)
+            return False
+
+    def adquirir(self) -> Any:
+        """
+        Obtém uma conexão livre, criando uma nova se o limite permitir.
+
+        Raises:
+            ConnectionError: Se nenhuma conexão ficar disponível a tempo.
+        """
+        while True:
+            try:
+                con, ociosa_desde = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            if self._conexao_ativa(con, ociosa_desde):
+                return con
+            self.devolver(con, descartar=True)
+
+        with self._lock:
+            pode_criar = self._criadas < self.tamanho_maximo
+            if pode_criar:
+                self._criadas += 1
+
+        if pode_criar:
+            try:
+                return self._criar_conexao()
+            except Exception:
+                with self._lock:
+                    self._criadas -= 1
+                raise
+
+        try:
+            con, ociosa_desde = self._livres.get(timeout=POOL_TIMEOUT_AQUISICAO)
+        except queue.Empty:
+            raise ConnectionError(
+                f"Nenhuma conexão disponível no pool do banco '{self.nome_bd}'."
+            ) from None
+        if self._conexao_ativa(con, ociosa_desde):
+            return con
+        # A conexão descartada libera espaço para criar outra
+        self.devolver(con, descartar=True)
+        return self.adquirir()
+
+    def devolver(self, con: Any, descartar: bool = False) -> None:
+        """
+        Devolve a conexão ao pool ou a fecha definitivamente.
+
+        Args:
+            con: Conexão obtida por `adquirir`.
+            descartar: Se True, fecha a conexão (ex: após erro) em vez de reutilizá-la.
+        """
+        if not descartar:
+            self._livres.put((con, time.monotonic()))
+            return
+
+        with self._lock:
+            self._criadas -= 1
+        try:
+            con.close()
+        except Exception as e:
+            logger.debug("Erro ao fechar conexão descartada: %s", e)
+
+    def encerrar(self) -> None:
+        """Fecha todas as conexões livres do pool."""
+        while True:
+            try:
+                con, _ = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            self.devolver(con, descartar=True)
+
+
+_pools: Dict[str, PoolConexoes] = {}
+_pools_lock = threading.Lock()
+
+# Threads dedicadas às consultas, no mesmo número de conexões do pool: mais
+# threads apenas ficariam bloqueadas aguardando uma conexão livre, e assim as
+# consultas não disputam o executor padrão (usado por outras tarefas com
+# `asyncio.to_thread`). Consultas canceladas por timeout continuam ocupando
+# sua thread até terminar (no máximo `TEMPO_LIMITE_CHAMADA_MS`), e este
+# limite impede que se acumulem.
+_executor_consultas = ThreadPoolExecutor(
+    max_workers=POOL_TAMANHO_MAXIMO, thread_name_prefix="consulta_bd"
+)
+
+
+def _obter_pool(nome_bd: str) -> PoolConexoes:
+    """Retorna o pool do banco informado, criando-o na primeira utilização."""
+    pool = _pools.get(nome_bd)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(nome_bd)
+            if pool is None:
+                pool = PoolConexoes(nome_bd, POOL_TAMANHO_MINIMO, POOL_TAMANHO_MAXIMO)
+                _pools[nome_bd] = pool
+    return pool
+
+
+async def inicializar_pool_conexoes(nome_bd: str = 'prod') -> None:
+    """
+    Pré-cria as conexões mínimas do pool durante a inicialização da aplicação.
+
+    Falhas são apenas registradas: as conexões serão criadas sob demanda.
+    """
+    pool = _obter_pool(nome_bd)
+    try:
+        await asyncio.to_thread(pool.preencher)
+        logger.info("Pool de conexões do banco '%s' inicializado com %s conexões.", nome_bd, pool.tamanho_minimo)
+    except Exception as e:
+        logger.error("Não foi possível pré-criar o pool de conexões do banco '%s': %s", nome_bd, e)
+
+
+async def encerrar_pools_conexoes() -> None:
+    """
+    Encerra o executor de consultas e fecha as conexões livres de todos os pools.
+    
+    Consultas ainda na fila são canceladas e as em execução (limitadas por
+    `TEMPO_LIMITE_CHAMADA_MS`) terminam antes, devolvendo suas conexões ao pool
+    para que também sejam fechadas.
+    """
+    await asyncio.to_thread(_executor_consultas.shutdown, wait=True, cancel_futures=True)
+    for pool in list(_pools.values()):
+        await asyncio.to_thread(pool.encerrar)
+    logger.info("Pools de conexões com o banco de dados encerrados.")
+
 
 @contextmanager
 def _gerenciar_conexao_bd(nome_bd: str = 'prod'):
     """
     Gerenciador de contexto para conexões com o banco de dados Oracle.
 
-    Garante que a conexão e o cursor sejam abertos e fechados corretamente,
-    mesmo em caso de erros.
+    Obtém uma conexão do pool e garante que o cursor seja fechado e a
+    conexão devolvida corretamente, mesmo em caso de erros. Conexões que
+    falharam durante a transação são descartadas.
     """
-    if not testarConexao(nome_bd):
-        raise ConnectionError("Não foi possível estabelecer conexão com o banco de dados.")
-
+    pool = _obter_pool(nome_bd)
     con = None
     cursor = None
+    falhou = False
     try:
-        con = conexao(nome_bd)
+        con = pool.adquirir()
         cursor = con.cursor()
-        logger.debug(f"Conexão com o banco '{nome_bd}' estabelecida com sucesso.")
+        logger.debug("Conexão com o banco '%s' obtida do pool.", nome_bd)
         yield cursor
         con.commit()
     except Exception as e:
-        logger.error(f"Erro durante a transação com o banco de dados: {e}", exc_info=True)
+        falhou = True
+        logger.error("Erro durante a transação com o banco de dados: %s", e, exc_info=True)
         if con:
-            con.rollback()
+            try:
+                con.rollback()
+            except Exception:
+                pass
         raise ExcecaoRobo(f"Erro na operação de banco de dados: {e}", type(e).__name__) from e
     finally:
         if cursor:
             cursor.close()
         if con:
-            con.close()
-        logger.debug("Conexão com o banco de dados fechada.")
+            pool.devolver(con, descartar=falhou)
+        logger.debug("Conexão com o banco de dados devolvida ao pool.")
+
+
+# Maior lote de linhas trazido por ida ao banco ao dimensionar pelo `:limite`
+MAX_LINHAS_POR_BUSCA = 1000
+
+
+def _dimensionar_busca(cursor: Any, params: Optional[Dict[str, Any]]) -> None:
+    """
+    Ajusta o cursor para trazer o resultado inteiro em uma única ida ao banco.
+
+    Quando a query tem o bind `:limite`, o total de linhas é conhecido de
+    antemão: `prefetchrows` (linhas enviadas já na resposta do execute) e
+    `arraysize` (linhas por busca do fetchall) são dimensionados por ele,
+    até `MAX_LINHAS_POR_BUSCA`, para que um limite alto não faça o driver
+    alocar buffers enormes. Demais queries mantêm os padrões do driver.
+    `prefetchrows` só existe a partir do cx_Oracle 8 (e no python-oracledb).
+    """
+    limite = (params or {}).get("limite")
+    if isinstance(limite, int) and not isinstance(limite, bool) and limite > 0:
+        linhas = min(limite, MAX_LINHAS_POR_BUSCA)
+        cursor.arraysize = linhas
+        if hasattr(cursor, "prefetchrows"):
+            cursor.prefetchrows = linhas + 1
 
 
 # --- FUNÇÃO CORRIGIDA ---
@@ -73,7 +319,8 @@ async def executar_consulta_selecao(sql: str, params: Optional[Dict[str, Any]] =
     def _executar_sincronamente() -> Dict[str, Any]:
         """Função interna síncrona para ser executada em uma thread separada."""
         with _gerenciar_conexao_bd(db) as cursor:
-            logger.debug(f"Executando SQL: {sql} com parâmetros: {params}")
+            logger.debug("Executando SQL: %s com parâmetros: %s", sql, params)
+            _dimensionar_busca(cursor, params)
             cursor.execute(sql, params or {})
             
             # Se a query não retornar colunas (ex: um UPDATE sem RETURNING), retorna lista vazia.
@@ -83,7 +330,7 @@ async def executar_consulta_selecao(sql: str, params: Optional[Dict[str, Any]] =
             # Constrói a lista de dicionários a partir do resultado
             nomes_colunas = [desc[0].lower() for desc in cursor.description]
             linhas = cursor.fetchall()
-            logger.info(f"{len(linhas)} registros retornados do banco.")
+            logger.info("%s registros retornados do banco.", len(linhas))
             
             dados = [dict(zip(nomes_colunas, linha)) for linha in linhas]
             return {"dados": dados, "erro": None}
@@ -91,20 +338,41 @@ async def executar_consulta_selecao(sql: str, params: Optional[Dict[str, Any]] =
     try:
         # Executa a função de I/O de banco de dados (que é síncrona) em uma thread
         # separada para não bloquear o event loop do asyncio.
-        return await asyncio.to_thread(_executar_sincronamente)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor_consultas, _executar_sincronamente)
     except Exception as e:
-        logger.error(f"Erro ao executar a consulta: {e}", exc_info=True)
+        logger.error("Erro ao executar a consulta: %s", e, exc_info=True)
         # Em caso de qualquer exceção, retorna o erro no formato padronizado.
         return {"dados": None, "erro": str(e)}
 
+# Textos fixos das buscas de cliente: o mesmo texto a cada chamada é o que
+# permite ao cache de statements da conexão reaproveitar o parse do Oracle
+_SQL_CLIENTE_POR_CODIGO = """
+        SELECT /*+ INDEX(PCCLIENT PK_PCCLIENT) */
+               CODCLI, CLIENTE, FANTASIA
+        FROM PCCLIENT
+        WHERE CODCLI = :codigo_cliente
+    """
+_SQL_CLIENTES_POR_NOME = """
+        SELECT CODCLI, CLIENTE, FANTASIA
+        FROM PCCLIENT
+        WHERE (LOWER(CLIENTE) LIKE :nome_cliente OR LOWER(FANTASIA) LIKE :nome_cliente)
+        FETCH FIRST :limite ROWS ONLY
+    """
+
 # --- FUNÇÃO CORRIGIDA E COMPLETADA ---
-async def encontrar_clientes_por_nome_ou_codigo(nome: Optional[str] = None, codigo: Optional[int] = None) -> Dict[str, Any]:
+async def encontrar_clientes_por_nome_ou_codigo(
+    nome: Optional[str] = None, codigo: Optional[int] = None, limite: int = 10
+) -> Dict[str, Any]:
     """
     Busca clientes por parte do nome/fantasia ou por código exato.
 
     Args:
         nome: Parte do nome ou nome fantasia do cliente.
         codigo: Código exato do cliente.
+        limite: Número máximo de clientes retornados na busca por nome. Para
+            apenas distinguir entre nenhum, um ou vários clientes, basta 2.
+            A busca por código retorna no máximo um cliente.
 
     Returns:
         Um dicionário no formato {'dados': [...], 'erro': None} ou {'dados': None, 'erro': '...'}.
@@ -112,24 +380,13 @@ async def encontrar_clientes_por_nome_ou_codigo(nome: Optional[str] = None, codi
     if not nome and not codigo:
         raise ValueError("Nome ou código do cliente deve ser fornecido.")
 
-    clausulas_where = []
-    params = {}
-
     if codigo:
-        clausulas_where.append("CODCLI = :codigo_cliente")
-        params["codigo_cliente"] = codigo
-    elif nome:
-        clausulas_where.append("(LOWER(CLIENTE) LIKE LOWER(:nome_cliente) OR LOWER(FANTASIA) LIKE LOWER(:nome_cliente))")
-        params["nome_cliente"] = f"%{nome}%"
-
-    declaracao_where = " AND ".join(clausulas_where)
-    
-    sql = f"""
-        SELECT CODCLI, CLIENTE, FANTASIA
-        FROM PCCLIENT
-        WHERE {declaracao_where}
-        FETCH FIRST 10 ROWS ONLY
-    """
+        # Busca pela chave primária: no máximo uma linha, sem necessidade de limite
+        sql = _SQL_CLIENTE_POR_CODIGO
+        params = {"codigo_cliente": codigo}
+    else:
+        sql = _SQL_CLIENTES_POR_NOME
+        params = {"nome_cliente": f"%{nome.lower()}%", "limite": limite}
     
     # Chama a função principal de execução e retorna seu resultado padronizado
     return await executar_consulta_selecao(sql=sql, params=params)
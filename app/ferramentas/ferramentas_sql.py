@@ -8,89 +8,158 @@ rejeita períodos inválidos ou "sempre" para consultas sensíveis.
 """
 
 import logging
-from datetime import date, datetime, time
-from typing import Any, Dict, List, Tuple
-
-from dateutil.relativedelta import relativedelta
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 ResultadoQuery = Tuple[str, Dict[str, Any]]
 
+# Máximo de clientes retornados quando a consulta filtra pelo nome
+LIMITE_CLIENTES_POR_NOME = 10
+
+
+@dataclass(frozen=True)
+class ClientePorNome:
+    """
+    Referência a um cliente cujo código ainda não foi resolvido.
+
+    Permite que as consultas de cliente filtrem diretamente pelo nome, em uma
+    única ida ao banco, em vez de resolver o código antes da consulta.
+
+    Attributes:
+        nome: Parte do nome ou nome fantasia do cliente.
+    """
+    nome: str
+
+
+ReferenciaCliente = Union[int, ClientePorNome]
+
 # --- Funções Auxiliares ---
 
+# Converte espaços e tabulações em "_" numa única passada (ex.: "este mes" -> "este_mes")
+_ESPACOS_PARA_SUBLINHADO = str.maketrans(" \t", "__")
+
+def _normalizar_chave(texto: Any) -> str:
+    """Normaliza um termo livre para a forma das chaves das tabelas de lookup."""
+    return str(texto).strip().lower().translate(_ESPACOS_PARA_SUBLINHADO)
+
+# Hints FIRST_ROWS(n) usam um valor fixo (o limite padrão de cada intenção):
+# hints não aceitam binds, e embutir o `limite` pedido geraria um texto SQL
+# diferente para cada valor, desperdiçando o cache de statements.
+#
+# O texto SQL depende apenas da "forma" da consulta (colunas, ordenação,
+# quantidade de palavras), não dos valores vinculados. As funções
+# `_sql_*` abaixo são memorizadas, de modo que o texto de cada forma é montado
+# uma única vez e as chamadas seguintes só montam o dicionário de parâmetros.
+
+@lru_cache(maxsize=32)
+def _sql_clausula_data(coluna_data: str) -> str:
+    """Texto da cláusula de range de datas para a coluna informada."""
+    return f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
+
+@lru_cache(maxsize=128)
+def _sql_filtro_texto(campos: Tuple[str, ...], nome_param: str, quantidade_palavras: int) -> str:
+    """
+    Texto da cláusula de busca flexível para a quantidade de palavras informada.
+
+    Cada palavra tem um único bind (`:{nome_param}_{j}`), reutilizado em todos
+    os campos; os padrões já chegam em minúsculas, dispensando LOWER() no bind.
+    """
+    return "(" + " OR ".join(
+        "(" + " AND ".join(f"LOWER({campo}) LIKE :{nome_param}_{j}" for j in range(quantidade_palavras)) + ")"
+        for campo in campos
+    ) + ")"
+
+# Intervalo [início, fim) de cada período aceito, calculado a partir do dia atual
+def _intervalo_dia(dia: date) -> Tuple[datetime, datetime]:
+    inicio = datetime.combine(dia, time.min)
+    return inicio, inicio + timedelta(days=1)
+
+def _intervalo_hoje(hoje: date) -> Tuple[datetime, datetime]:
+    return _intervalo_dia(hoje)
+
+def _intervalo_ontem(hoje: date) -> Tuple[datetime, datetime]:
+    return _intervalo_dia(hoje - timedelta(days=1))
+
+def _intervalo_este_mes(hoje: date) -> Tuple[datetime, datetime]:
+    inicio_mes = hoje.replace(day=1)
+    # Dia 1 + 32 dias sempre cai no mês seguinte
+    inicio_proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    return datetime.combine(inicio_mes, time.min), datetime.combine(inicio_proximo_mes, time.min)
+
+def _intervalo_ultimo_mes(hoje: date) -> Tuple[datetime, datetime]:
+    inicio_mes = hoje.replace(day=1)
+    inicio_mes_anterior = (inicio_mes - timedelta(days=1)).replace(day=1)
+    return datetime.combine(inicio_mes_anterior, time.min), datetime.combine(inicio_mes, time.min)
+
+def _intervalo_esta_semana(hoje: date) -> Tuple[datetime, datetime]:
+    # Segunda-feira da semana atual
+    inicio_semana = datetime.combine(hoje - timedelta(days=hoje.weekday()), time.min)
+    return inicio_semana, inicio_semana + timedelta(days=7)
+
+def _intervalo_semana_passada(hoje: date) -> Tuple[datetime, datetime]:
+    # Segunda-feira da semana passada
+    inicio_semana_atual = datetime.combine(hoje - timedelta(days=hoje.weekday()), time.min)
+    return inicio_semana_atual - timedelta(days=7), inicio_semana_atual
+
+INTERVALOS_PERIODO: Mapping[str, Callable[[date], Tuple[datetime, datetime]]] = MappingProxyType({
+    'hoje': _intervalo_hoje,
+    'ontem': _intervalo_ontem,
+    'este_mes': _intervalo_este_mes,
+    'mes_atual': _intervalo_este_mes,
+    'ultimo_mes': _intervalo_ultimo_mes,
+    'mes_passado': _intervalo_ultimo_mes,
+    'esta_semana': _intervalo_esta_semana,
+    'semana_atual': _intervalo_esta_semana,
+    'ultima_semana': _intervalo_semana_passada,
+    'semana_passada': _intervalo_semana_passada,
+})
+
+# Lista de períodos aceitos, usada nas mensagens de erro
+PERIODOS_VALIDOS = ", ".join(INTERVALOS_PERIODO)
+
+MENSAGEM_PERIODO_OBRIGATORIO = "Período de tempo é obrigatório para esta consulta. Use: hoje, este_mes, ultimo_mes, etc."
+
+@lru_cache(maxsize=64)
+def _intervalo_periodo(periodo_normalizado: str, dia_ordinal: int) -> Tuple[datetime, datetime]:
+    """
+    Intervalo do período para o dia informado (como ordinal).
+    
+    A chave inclui o dia, então cada período é calculado uma vez por dia e a
+    virada do dia gera novas entradas automaticamente.
+    """
+    return INTERVALOS_PERIODO[periodo_normalizado](date.fromordinal(dia_ordinal))
+
 def _construir_clausula_data_otimizada(periodo_tempo: str, coluna_data: str) -> Tuple[str, Dict[str, Any]]:
     """
     Constrói uma cláusula WHERE de data otimizada usando ranges.
     VERSÃO RIGOROSA: Agora rejeita períodos inválidos ou "sempre" para evitar sobrecarga na base.
     """
-    if not periodo_tempo or periodo_tempo.lower().strip() == "sempre":
-        raise ValueError("Período de tempo é obrigatório e não pode ser 'sempre'. Use: hoje, este_mes, ultimo_mes, etc.")
-    
-    hoje = date.today()
-    params = {}
-    
-    periodo_normalizado = str(periodo_tempo).lower().replace(" ", "_").strip()
-
-    if periodo_normalizado == 'hoje':
-        data_inicio = datetime.combine(hoje, time.min)
-        data_fim = datetime.combine(hoje + relativedelta(days=1), time.min)
-        clausula = f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
-        params['data_inicio'] = data_inicio
-        params['data_fim'] = data_fim
-        
-    elif periodo_normalizado in ['este_mes', 'mes_atual']:
-        data_inicio = datetime.combine(hoje.replace(day=1), time.min)
-        data_fim = datetime.combine(data_inicio.date() + relativedelta(months=1), time.min)
-        clausula = f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
-        params['data_inicio'] = data_inicio
-        params['data_fim'] = data_fim
-
-    elif periodo_normalizado in ['ultimo_mes', 'mes_passado']:
-        data_fim = datetime.combine(hoje.replace(day=1), time.min)
-        data_inicio = datetime.combine((data_fim.date() - relativedelta(months=1)), time.min)
-        clausula = f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
-        params['data_inicio'] = data_inicio
-        params['data_fim'] = data_fim
-
-    elif periodo_normalizado in ['esta_semana', 'semana_atual']:
-        # Segunda-feira da semana atual
-        dias_desde_segunda = hoje.weekday()
-        inicio_semana = hoje - relativedelta(days=dias_desde_segunda)
-        data_inicio = datetime.combine(inicio_semana, time.min)
-        data_fim = datetime.combine(inicio_semana + relativedelta(days=7), time.min)
-        clausula = f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
-        params['data_inicio'] = data_inicio
-        params['data_fim'] = data_fim
-
-    elif periodo_normalizado in ['semana_passada', 'ultima_semana']:
-        # Segunda-feira da semana passada
-        dias_desde_segunda = hoje.weekday()
-        inicio_semana_atual = hoje - relativedelta(days=dias_desde_segunda)
-        inicio_semana_passada = inicio_semana_atual - relativedelta(days=7)
-        data_inicio = datetime.combine(inicio_semana_passada, time.min)
-        data_fim = datetime.combine(inicio_semana_atual, time.min)
-        clausula = f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
-        params['data_inicio'] = data_inicio
-        params['data_fim'] = data_fim
-
-    elif periodo_normalizado in ['ontem']:
-        ontem = hoje - relativedelta(days=1)
-        data_inicio = datetime.combine(ontem, time.min)
-        data_fim = datetime.combine(ontem + relativedelta(days=1), time.min)
-        clausula = f"{coluna_data} >= :data_inicio AND {coluna_data} < :data_fim"
-        params['data_inicio'] = data_inicio
-        params['data_fim'] = data_fim
-        
+    # Caminho rápido: o LLM e os padrões do orquestrador já enviam a forma canônica
+    if periodo_tempo in INTERVALOS_PERIODO:
+        periodo_normalizado = periodo_tempo
     else:
-        periodos_validos = [
-            'hoje', 'ontem', 'este_mes', 'mes_atual', 'ultimo_mes', 'mes_passado',
-            'esta_semana', 'semana_atual', 'ultima_semana', 'semana_passada'
-        ]
-        raise ValueError(f"Período '{periodo_tempo}' não é válido. Use um dos seguintes: {', '.join(periodos_validos)}")
-        
-    logger.debug(f"Período '{periodo_tempo}' convertido para range: {data_inicio} até {data_fim}")
-    return clausula, params
+        # Uma única passada de normalização atende às duas validações
+        periodo_normalizado = _normalizar_chave(periodo_tempo) if periodo_tempo else ""
+        if not periodo_normalizado or periodo_normalizado == "sempre":
+            raise ValueError("Período de tempo é obrigatório e não pode ser 'sempre'. Use: hoje, este_mes, ultimo_mes, etc.")
+        if periodo_normalizado not in INTERVALOS_PERIODO:
+            raise ValueError(f"Período '{periodo_tempo}' não é válido. Use um dos seguintes: {PERIODOS_VALIDOS}")
+    
+    data_inicio, data_fim = _intervalo_periodo(periodo_normalizado, date.today().toordinal())
+    logger.debug("Período '%s' convertido para range: %s até %s", periodo_tempo, data_inicio, data_fim)
+    return _sql_clausula_data(coluna_data), {'data_inicio': data_inicio, 'data_fim': data_fim}
+
+def _exigir_periodo(periodo_tempo: str, mensagem: str = MENSAGEM_PERIODO_OBRIGATORIO) -> None:
+    """Rejeita período ausente ou "sempre" nas consultas que exigem filtro de data."""
+    if periodo_tempo in INTERVALOS_PERIODO:
+        return
+    if not periodo_tempo or periodo_tempo.strip().lower() == "sempre":
+        raise ValueError(mensagem)
 
 def _construir_filtro_texto_flexivel(termo: str, campos: List[str], nome_param: str) -> Tuple[str, Dict[str, Any]]:
     """
@@ -98,52 +167,66 @@ def _construir_filtro_texto_flexivel(termo: str, campos: List[str], nome_param:
     AVISO: O uso de LOWER() e LIKE '%palavra%' pode ser lento em tabelas grandes,
     pois geralmente impede o uso de índices padrão.
     """
-    palavras_chave = str(termo).split()
+    palavras_chave = str(termo).lower().split()
     if not palavras_chave:
         return "", {}
-    params = {}
-    clausulas_campo = []
-    for i, campo in enumerate(campos):
-        clausulas_palavra_chave = []
-        for j, palavra in enumerate(palavras_chave):
-            key_param = f"{nome_param}_{i}_{j}"
-            clausulas_palavra_chave.append(f"LOWER({campo}) LIKE LOWER(:{key_param})")
-            params[key_param] = f"%{palavra}%"
-        clausulas_campo.append(f"({' AND '.join(clausulas_palavra_chave)})")
-    return f"({' OR '.join(clausulas_campo)})", params
+    params = {f"{nome_param}_{j}": f"%{palavra}%" for j, palavra in enumerate(palavras_chave)}
+    return _sql_filtro_texto(tuple(campos), nome_param, len(palavras_chave)), params
+
+def _construir_query_cliente_por_nome(colunas: str, cliente: ClientePorNome) -> ResultadoQuery:
+    """
+    Constrói uma consulta à PCCLIENT filtrando pelo nome ou fantasia do cliente.
+
+    Sempre seleciona CODCLI e CLIENTE para que o chamador possa detectar
+    ambiguidade (mais de um cliente encontrado) a partir do próprio resultado.
+    """
+    return _sql_cliente_por_nome(colunas), {"nome_cliente": f"%{cliente.nome.lower()}%"}
+
+@lru_cache(maxsize=32)
+def _sql_cliente_por_nome(colunas: str) -> str:
+    return f"""
+        SELECT {colunas}
+        FROM PCCLIENT
+        WHERE (LOWER(CLIENTE) LIKE :nome_cliente OR LOWER(FANTASIA) LIKE :nome_cliente)
+        FETCH FIRST {LIMITE_CLIENTES_POR_NOME} ROWS ONLY
+    """
 
 # --- Construtores de Query: PRODUTOS ---
 
+# Critérios de ranking de produtos aceitos (incluindo sinônimos) e a ordenação de cada um
+ORDENACAO_PRODUTOS_POR_CRITERIO: Mapping[str, str] = MappingProxyType({
+    "mais_vendidos": "TOTAL_VENDIDO DESC",
+    "maior_valor_vendas": "TOTAL_VENDIDO DESC",
+    "top_vendas": "TOTAL_VENDIDO DESC",
+    "menos_vendidos": "TOTAL_VENDIDO ASC",
+})
+
 def construir_query_produtos_classificados(criterio_classificacao: str, periodo_tempo: str, limite: int) -> ResultadoQuery:
     """
     Constrói uma query otimizada para classificar produtos com base em critérios de vendas.
     VERSÃO RIGOROSA: Agora exige período válido obrigatório.
     """
-    logger.info(f"Construindo query de ranking de produtos com critério: {criterio_classificacao}")
+    logger.info("Construindo query de ranking de produtos com critério: %s", criterio_classificacao)
     
-    if not periodo_tempo or periodo_tempo.strip().lower() == "sempre":
-        raise ValueError("Período de tempo é obrigatório para esta consulta. Use: hoje, este_mes, ultimo_mes, etc.")
+    _exigir_periodo(periodo_tempo)
     
-    mapa_sinonimos = {
-        "mais_vendidos": "mais_vendidos", "maior_valor_vendas": "mais_vendidos",
-        "top_vendas": "mais_vendidos", "menos_vendidos": "menos_vendidos",
-    }
-    criterio_normalizado = mapa_sinonimos.get(str(criterio_classificacao).lower().replace(" ", "_"))
-
-    mapa_ordenacao = {"mais_vendidos": "TOTAL_VENDIDO DESC", "menos_vendidos": "TOTAL_VENDIDO ASC"}
-    clausula_ordenacao = mapa_ordenacao.get(criterio_normalizado)
+    clausula_ordenacao = ORDENACAO_PRODUTOS_POR_CRITERIO.get(criterio_classificacao)
+    if not clausula_ordenacao:
+        clausula_ordenacao = ORDENACAO_PRODUTOS_POR_CRITERIO.get(_normalizar_chave(criterio_classificacao))
     if not clausula_ordenacao:
         raise ValueError(f"Critério de classificação inválido para vendas: {criterio_classificacao}")
 
-    params = {"limite": limite}
-    
     # Validação rigorosa: período sempre obrigatório
-    clausula_data, params_data = _construir_clausula_data_otimizada(periodo_tempo, 'C.DATA')
-    params.update(params_data)
+    clausula_data, params = _construir_clausula_data_otimizada(periodo_tempo, 'C.DATA')
+    params["limite"] = limite
+
+    return _sql_produtos_classificados(clausula_data, clausula_ordenacao), params
 
+@lru_cache(maxsize=128)
+def _sql_produtos_classificados(clausula_data: str, clausula_ordenacao: str) -> str:
     # Otimizada: Uso de hint INDEX_COMBINE, filtro DTEXCLUSAO movido para dentro da subquery
-    sql = f"""
-        SELECT /*+ FIRST_ROWS({limite}) INDEX_COMBINE(P) */ 
+    return f"""
+        SELECT /*+ FIRST_ROWS(10) INDEX_COMBINE(P) */ 
                P.CODPROD, P.DESCRICAO, P.PVENDA, VENDAS.TOTAL_VENDIDO
         FROM PCPRODUT P
         INNER JOIN (
@@ -158,28 +241,28 @@ def construir_query_produtos_classificados(criterio_classificacao: str, periodo_
         ORDER BY {clausula_ordenacao}
         FETCH FIRST :limite ROWS ONLY
     """
-    return sql, params
 
 # --- Construtores de Query: CLIENTES ---
 
 def construir_query_clientes_classificados(criterio_classificacao: str, periodo_tempo: str, limite: int) -> ResultadoQuery:
-    logger.info(f"Construindo query de ranking de clientes por: {criterio_classificacao}")
+    logger.info("Construindo query de ranking de clientes por: %s", criterio_classificacao)
 
-    if not periodo_tempo or periodo_tempo.strip().lower() == "sempre":
-        raise ValueError("Período de tempo é obrigatório para esta consulta. Use: hoje, este_mes, ultimo_mes, etc.")
+    _exigir_periodo(periodo_tempo)
 
     if criterio_classificacao != 'maior_valor_compras':
         raise ValueError(f"Critério de classificação de cliente inválido: {criterio_classificacao}")
 
-    params = {"limite": limite}
-    
     # Validação rigorosa: período sempre obrigatório
-    clausula_data, params_data = _construir_clausula_data_otimizada(periodo_tempo, 'DATA')
-    params.update(params_data)
+    clausula_data, params = _construir_clausula_data_otimizada(periodo_tempo, 'DATA')
+    params["limite"] = limite
 
+    return _sql_clientes_classificados(clausula_data), params
+
+@lru_cache(maxsize=128)
+def _sql_clientes_classificados(clausula_data: str) -> str:
     # Otimizada: Hint para usar índice na data e evitar sort desnecessário
-    sql = f"""
-        SELECT /*+ FIRST_ROWS({limite}) INDEX(C) */
+    return f"""
+        SELECT /*+ FIRST_ROWS(10) INDEX(C) */
                C.CODCLI, C.CLIENTE, C.FANTASIA, GASTOS.VALOR_TOTAL_GASTO
         FROM PCCLIENT C
         INNER JOIN (
@@ -192,14 +275,16 @@ def construir_query_clientes_classificados(criterio_classificacao: str, periodo_
         ORDER BY GASTOS.VALOR_TOTAL_GASTO DESC
         FETCH FIRST :limite ROWS ONLY
     """
-    return sql, params
 
 def construir_query_detalhes_produto(nome_produto: str) -> ResultadoQuery:
-    logger.info(f"Construindo query de detalhes para o produto: {nome_produto}")
+    logger.info("Construindo query de detalhes para o produto: %s", nome_produto)
     clausula_produto, params = _construir_filtro_texto_flexivel(nome_produto, ["P.DESCRICAO"], "produto")
-    
+    return _sql_detalhes_produto(clausula_produto), params
+
+@lru_cache(maxsize=32)
+def _sql_detalhes_produto(clausula_produto: str) -> str:
     # Otimizada: Filtro DTEXCLUSAO primeiro para reduzir dataset, hint para uso de índice
-    sql = f"""
+    return f"""
         SELECT /*+ FIRST_ROWS(5) INDEX(P IDX_PCPRODUT_DESCRICAO) */
                P.CODPROD, P.DESCRICAO, P.MARCA, P.PESOLIQ, P.PVENDA, F.FORNECEDOR
         FROM PCPRODUT P
@@ -208,30 +293,31 @@ def construir_query_detalhes_produto(nome_produto: str) -> ResultadoQuery:
           AND {clausula_produto}
         FETCH FIRST 5 ROWS ONLY
     """
-    return sql, params
 
 def construir_query_produtos_por_marca(marca: str, limite: int) -> ResultadoQuery:
-    logger.info(f"Construindo query para produtos da marca: {marca}")
+    logger.info("Construindo query para produtos da marca: %s", marca)
     clausula_marca, params = _construir_filtro_texto_flexivel(marca, ["P.MARCA"], "marca")
     params["limite"] = limite
-    
+    return _sql_produtos_por_marca(clausula_marca), params
+
+@lru_cache(maxsize=32)
+def _sql_produtos_por_marca(clausula_marca: str) -> str:
     # Otimizada: Filtro DTEXCLUSAO primeiro, hint para índice na marca
-    sql = f"""
-        SELECT /*+ FIRST_ROWS(:limite) INDEX(P IDX_PCPRODUT_MARCA) */
+    return f"""
+        SELECT /*+ FIRST_ROWS(20) INDEX(P IDX_PCPRODUT_MARCA) */
                CODPROD, DESCRICAO, PVENDA 
         FROM PCPRODUT P
         WHERE P.DTEXCLUSAO IS NULL 
           AND {clausula_marca}
         FETCH FIRST :limite ROWS ONLY
     """
-    return sql, params
 
 def construir_query_produtos_descontinuados(limite: int) -> ResultadoQuery:
     logger.info("Construindo query para produtos descontinuados")
     
     # Otimizada: Hint para usar índice na DTEXCLUSAO
     sql = """
-        SELECT /*+ FIRST_ROWS(:limite) INDEX(PCPRODUT IDX_PCPRODUT_DTEXCLUSAO) */
+        SELECT /*+ FIRST_ROWS(20) INDEX(PCPRODUT IDX_PCPRODUT_DTEXCLUSAO) */
                CODPROD, DESCRICAO, DTEXCLUSAO 
         FROM PCPRODUT
         WHERE DTEXCLUSAO IS NOT NULL
@@ -242,71 +328,74 @@ def construir_query_produtos_descontinuados(limite: int) -> ResultadoQuery:
 
 # --- Construtores de Query: CLIENTES (Consultas Simples) ---
 
-def construir_query_limite_credito(codigo_cliente: int) -> ResultadoQuery:
-    # Otimizada: Hint para busca por chave primária
-    sql = """
-        SELECT /*+ INDEX(PCCLIENT PK_PCCLIENT) */
-               CODCLI, CLIENTE, LIMCRED 
-        FROM PCCLIENT 
-        WHERE CODCLI = :codigo_cliente
-    """
-    return sql, {"codigo_cliente": codigo_cliente}
+# Colunas de cada consulta pontual de cliente (CODCLI e CLIENTE vêm sempre primeiro)
+COLUNAS_LIMITE_CREDITO = "CODCLI, CLIENTE, LIMCRED"
+COLUNAS_STATUS_CLIENTE = "CODCLI, CLIENTE, BLOQUEIO, MOTIVOBLOQ, DTBLOQ"
+COLUNAS_CONTATO_CLIENTE = "CODCLI, CLIENTE, TELENT, EMAIL"
+COLUNAS_ENDERECO_CLIENTE = "CODCLI, CLIENTE, ENDERENT, NUMEROENT, BAIRROENT, MUNICENT, ESTENT, CEPENT"
 
-def construir_query_status_cliente(codigo_cliente: int) -> ResultadoQuery:
-    # Otimizada: Hint para busca por chave primária
-    sql = """
-        SELECT /*+ INDEX(PCCLIENT PK_PCCLIENT) */
-               CODCLI, CLIENTE, BLOQUEIO, MOTIVOBLOQ, DTBLOQ 
-        FROM PCCLIENT 
-        WHERE CODCLI = :codigo_cliente
+def _construir_query_cliente(colunas: str, codigo_cliente: ReferenciaCliente) -> ResultadoQuery:
     """
-    return sql, {"codigo_cliente": codigo_cliente}
+    Constrói uma consulta pontual à PCCLIENT com as colunas informadas.
 
-def construir_query_contato_cliente(codigo_cliente: int) -> ResultadoQuery:
-    # Otimizada: Hint para busca por chave primária
-    sql = """
-        SELECT /*+ INDEX(PCCLIENT PK_PCCLIENT) */
-               CODCLI, CLIENTE, TELENT, EMAIL 
-        FROM PCCLIENT 
-        WHERE CODCLI = :codigo_cliente
+    Filtra pela chave primária quando o código é conhecido, ou pelo nome
+    quando o cliente ainda não foi resolvido.
     """
-    return sql, {"codigo_cliente": codigo_cliente}
+    if isinstance(codigo_cliente, ClientePorNome):
+        return _construir_query_cliente_por_nome(colunas, codigo_cliente)
+    return _sql_cliente_por_codigo(colunas), {"codigo_cliente": codigo_cliente}
 
-def construir_query_endereco_cliente(codigo_cliente: int) -> ResultadoQuery:
+@lru_cache(maxsize=32)
+def _sql_cliente_por_codigo(colunas: str) -> str:
     # Otimizada: Hint para busca por chave primária
-    sql = """
+    return f"""
         SELECT /*+ INDEX(PCCLIENT PK_PCCLIENT) */
-               CODCLI, CLIENTE, ENDERENT, NUMEROENT, BAIRROENT, MUNICENT, ESTENT, CEPENT 
-        FROM PCCLIENT 
+               {colunas}
+        FROM PCCLIENT
         WHERE CODCLI = :codigo_cliente
     """
-    return sql, {"codigo_cliente": codigo_cliente}
+
+def construir_query_limite_credito(codigo_cliente: ReferenciaCliente) -> ResultadoQuery:
+    return _construir_query_cliente(COLUNAS_LIMITE_CREDITO, codigo_cliente)
+
+def construir_query_status_cliente(codigo_cliente: ReferenciaCliente) -> ResultadoQuery:
+    return _construir_query_cliente(COLUNAS_STATUS_CLIENTE, codigo_cliente)
+
+def construir_query_contato_cliente(codigo_cliente: ReferenciaCliente) -> ResultadoQuery:
+    return _construir_query_cliente(COLUNAS_CONTATO_CLIENTE, codigo_cliente)
+
+def construir_query_endereco_cliente(codigo_cliente: ReferenciaCliente) -> ResultadoQuery:
+    return _construir_query_cliente(COLUNAS_ENDERECO_CLIENTE, codigo_cliente)
 
 def construir_query_clientes_por_cidade(cidade: str, limite: int) -> ResultadoQuery:
     clausula_cidade, params = _construir_filtro_texto_flexivel(cidade, ["MUNICENT"], "cidade")
     params["limite"] = limite
-    
+    return _sql_clientes_por_cidade(clausula_cidade), params
+
+@lru_cache(maxsize=32)
+def _sql_clientes_por_cidade(clausula_cidade: str) -> str:
     # Otimizada: Filtro DTEXCLUSAO primeiro, hint para índice na cidade
-    sql = f"""
-        SELECT /*+ FIRST_ROWS(:limite) INDEX(PCCLIENT IDX_PCCLIENT_MUNICENT) */
+    return f"""
+        SELECT /*+ FIRST_ROWS(20) INDEX(PCCLIENT IDX_PCCLIENT_MUNICENT) */
                CODCLI, CLIENTE, FANTASIA, MUNICENT 
         FROM PCCLIENT
         WHERE DTEXCLUSAO IS NULL 
           AND {clausula_cidade}
         FETCH FIRST :limite ROWS ONLY
     """
-    return sql, params
 
 def construir_query_clientes_recentes(periodo_tempo: str, limite: int) -> ResultadoQuery:
-    if not periodo_tempo or periodo_tempo.strip().lower() == "sempre":
-        raise ValueError("Período de tempo específico é obrigatório para esta consulta.")
+    _exigir_periodo(periodo_tempo, "Período de tempo específico é obrigatório para esta consulta.")
         
     clausula_data, params = _construir_clausula_data_otimizada(periodo_tempo, 'DTCADASTRO')
     params["limite"] = limite
-    
+    return _sql_clientes_recentes(clausula_data), params
+
+@lru_cache(maxsize=32)
+def _sql_clientes_recentes(clausula_data: str) -> str:
     # Otimizada: Hint para usar índice na data de cadastro, filtro DTEXCLUSAO otimizado
-    sql = f"""
-        SELECT /*+ FIRST_ROWS(:limite) INDEX(PCCLIENT IDX_PCCLIENT_DTCADASTRO) */
+    return f"""
+        SELECT /*+ FIRST_ROWS(20) INDEX(PCCLIENT IDX_PCCLIENT_DTCADASTRO) */
                CODCLI, CLIENTE, DTCADASTRO 
         FROM PCCLIENT
         WHERE DTEXCLUSAO IS NULL 
@@ -314,21 +403,22 @@ def construir_query_clientes_recentes(periodo_tempo: str, limite: int) -> Result
         ORDER BY DTCADASTRO DESC
         FETCH FIRST :limite ROWS ONLY
     """
-    return sql, params
 
 # --- Construtores de Query: PEDIDOS ---
 
 def construir_query_registros_vendas(codigo_cliente: int, periodo_tempo: str, limite: int) -> ResultadoQuery:
-    if not periodo_tempo or periodo_tempo.strip().lower() == "sempre":
-        raise ValueError("Período de tempo é obrigatório para esta consulta. Use: hoje, este_mes, ultimo_mes, etc.")
-    
-    params = {"codigo_cliente": codigo_cliente, "limite": limite}
-    clausula_data, params_data = _construir_clausula_data_otimizada(periodo_tempo, 'PC.DATA')
-    params.update(params_data)
+    _exigir_periodo(periodo_tempo)
     
+    clausula_data, params = _construir_clausula_data_otimizada(periodo_tempo, 'PC.DATA')
+    params["codigo_cliente"] = codigo_cliente
+    params["limite"] = limite
+    return _sql_registros_vendas(clausula_data), params
+
+@lru_cache(maxsize=32)
+def _sql_registros_vendas(clausula_data: str) -> str:
     # Otimizada: Hint para usar índices compostos, JOIN otimizado
-    sql = f"""
-        SELECT /*+ FIRST_ROWS(:limite) INDEX(PC IDX_PCPEDC_CODCLI_DATA) INDEX(C PK_PCCLIENT) */
+    return f"""
+        SELECT /*+ FIRST_ROWS(50) INDEX(PC IDX_PCPEDC_CODCLI_DATA) INDEX(C PK_PCCLIENT) */
                C.CODCLI, C.CLIENTE, PC.NUMPED, PC.VLTOTAL, PC.POSICAO, PC.DATA
         FROM PCPEDC PC 
         INNER JOIN PCCLIENT C ON C.CODCLI = PC.CODCLI
@@ -336,7 +426,6 @@ def construir_query_registros_vendas(codigo_cliente: int, periodo_tempo: str, li
         ORDER BY PC.DATA DESC
         FETCH FIRST :limite ROWS ONLY
     """
-    return sql, params
 
 def construir_query_itens_pedido(id_pedido: int) -> ResultadoQuery:
     # Otimizada: Hint para usar índice no NUMPED, join otimizado
@@ -380,13 +469,27 @@ def construir_query_data_entrega_pedido(id_pedido: int) -> ResultadoQuery:
     """
     return sql, {"id_pedido": id_pedido}
 
+# Códigos de POSICAO da PCPEDC por nome; os próprios códigos também são aceitos
+CODIGOS_POSICAO_PEDIDO: Mapping[str, str] = MappingProxyType({
+    'liberado': 'L',
+    'bloqueado': 'B',
+    'pendente': 'P',
+    'faturado': 'F',
+    'L': 'L',
+    'B': 'B',
+    'P': 'P',
+    'F': 'F',
+})
+
 def construir_query_pedidos_por_posicao(posicao: str, limite: int) -> ResultadoQuery:
-    mapa_posicao = {'liberado': 'L', 'bloqueado': 'B', 'pendente': 'P', 'faturado': 'F'}
-    posicao_cod = mapa_posicao.get(posicao.lower(), posicao.upper())
+    # Caminho rápido: nome ou código já na forma canônica dispensa .lower()
+    posicao_cod = CODIGOS_POSICAO_PEDIDO.get(posicao)
+    if posicao_cod is None:
+        posicao_cod = CODIGOS_POSICAO_PEDIDO.get(posicao.lower(), posicao.upper())
     
     # Otimizada: Hint para usar índice na posição e data
     sql = """
-        SELECT /*+ FIRST_ROWS(:limite) INDEX(PCPEDC IDX_PCPEDC_POSICAO_DATA) */
+        SELECT /*+ FIRST_ROWS(20) INDEX(PCPEDC IDX_PCPEDC_POSICAO_DATA) */
                NUMPED, CODCLI, VLTOTAL, DATA 
         FROM PCPEDC
         WHERE POSICAO = :posicao
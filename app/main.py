@@ -17,7 +17,7 @@ from datetime import datetime
 from typing import Annotated, Set, Optional
 
 from fastapi import FastAPI, Depends, HTTPException, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
@@ -26,10 +26,12 @@ load_dotenv()  # Carrega variáveis de ambiente antes de importações locais
 
 from helpers_compartilhados.helpers import configurar_logging
 from langchain_ollama import OllamaLLM
-from app.core.orquestrador import gerenciar_consulta_usuario
-from app.core.processador_whatsapp import processador_whatsapp
+from app.agentes.agente_roteador import aquecer_llm
+from app.core.orquestrador import gerenciar_consulta_usuario, gerenciar_consulta_usuario_em_partes
+from app.core.processador_whatsapp import processador_whatsapp, extrair_mensagem_webhook
 from app.core.cliente_waha import cliente_waha
 from app.core.gerenciador_contexto import gerenciador_contexto
+from app.db.consultas import inicializar_pool_conexoes, encerrar_pools_conexoes
 
 # --- Configuração Inicial ---
 configurar_logging('log_bot')
@@ -212,6 +214,10 @@ async def lifespan(app: FastAPI):
     # Configurar LLM
     base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     model = os.getenv("LLM_MODEL", "llama3.1")
+    # Duração (ex: "30m") ou número de segundos; negativo mantém o modelo carregado
+    keep_alive = os.getenv("LLM_KEEP_ALIVE", "30m")
+    if keep_alive.lstrip("-").isdigit():
+        keep_alive = int(keep_alive)
     
     if not model:
         logger.critical("Variável de ambiente LLM_MODEL não definida.")
@@ -225,7 +231,7 @@ async def lifespan(app: FastAPI):
             base_url=base_url,
             temperature=0.1,
             client_kwargs={"timeout": 120.0},
-            keep_alive="30m",
+            keep_alive=keep_alive,
             validate_model_on_init=True
         )
         logger.info("Instância do LLM criada e pronta para uso.")
@@ -233,8 +239,14 @@ async def lifespan(app: FastAPI):
         logger.critical(f"Falha ao inicializar LLM: {e}")
         raise RuntimeError(f"Não foi possível inicializar o LLM: {e}")
 
+    # Carregar o modelo agora, e não durante a primeira pergunta do usuário
+    await aquecer_llm(app.state.llm)
+
     # Iniciar gerenciador de contexto
     await gerenciador_contexto.iniciar()
+
+    # Pré-criar conexões com o banco antes da primeira consulta
+    await inicializar_pool_conexoes()
     
     # Armazenar gerenciador de tasks no estado da app
     app.state.gerenciador_tasks = gerenciador_tasks
@@ -252,6 +264,12 @@ async def lifespan(app: FastAPI):
     # Encerrar cliente WAHA
     await cliente_waha.close()
 
+    # Fechar conexão de deduplicação do processador WhatsApp
+    await processador_whatsapp.encerrar()
+
+    # Fechar conexões com o banco de dados
+    await encerrar_pools_conexoes()
+
     # Limpar recursos
     app.state.llm = None
     logger.info("Recursos liberados com sucesso")
@@ -545,21 +563,18 @@ async def endpoint_chat(
     try:
         logger.info(f"Processando mensagem de {mensagem.id_usuario}: {mensagem.texto[:50]}...")
         
-        # Adicionar mensagem ao contexto
-        await gerenciador_contexto.adicionar_mensagem(
+        # Adicionar mensagem ao contexto e obter o histórico anterior a ela
+        contexto = await gerenciador_contexto.adicionar_mensagem_e_obter_contexto(
             usuario_id=mensagem.id_usuario,
             texto=mensagem.texto,
             tipo="text"
         )
         
-        # Obter contexto da conversa
-        contexto = await gerenciador_contexto.obter_contexto(mensagem.id_usuario)
-        
         # Construir prompt com contexto
         prompt_completo = f"{contexto}{mensagem.texto}" if contexto else mensagem.texto
         
         # Processar consulta
-        texto_resposta = await gerenciar_consulta_usuario(llm, prompt_completo)
+        texto_resposta = await gerenciar_consulta_usuario(llm, prompt_completo, mensagem.texto)
         
         # Adicionar resposta ao contexto
         await gerenciador_contexto.adicionar_resposta_bot(
@@ -582,6 +597,58 @@ async def endpoint_chat(
         )
 
 
+@app.post("/chat/stream", summary="Interage com o Bot (streaming)", tags=["Chat"])
+async def endpoint_chat_stream(
+    mensagem: MensagemUsuario,
+    llm: Annotated[OllamaLLM, Depends(obter_llm)]
+):
+    """
+    Versão em streaming do endpoint /chat.
+    
+    A resposta é enviada em texto puro, trecho a trecho, à medida que o LLM
+    gera a sumarização. Ao final do streaming, a resposta completa é
+    registrada no contexto do usuário, como no /chat.
+    
+    Args:
+        mensagem: Objeto contendo o ID do usuário e o texto da mensagem.
+        llm: Instância do modelo OllamaLLM (injetada automaticamente).
+        
+    Returns:
+        StreamingResponse: Resposta em texto puro enviada progressivamente.
+        
+    Examples:
+        >>> # POST /chat/stream
+        >>> {
+        >>>   "id_usuario": "user123",
+        >>>   "texto": "quais os produtos mais vendidos?"
+        >>> }
+        >>> # Response (text/plain, em partes):
+        >>> "Aqui estão os produtos mais vendidos..."
+    """
+    logger.info(f"Processando mensagem (streaming) de {mensagem.id_usuario}: {mensagem.texto[:50]}...")
+    
+    contexto = await gerenciador_contexto.adicionar_mensagem_e_obter_contexto(
+        usuario_id=mensagem.id_usuario,
+        texto=mensagem.texto,
+        tipo="text"
+    )
+    prompt_completo = f"{contexto}{mensagem.texto}" if contexto else mensagem.texto
+    
+    async def gerar_resposta():
+        trechos = []
+        async for trecho in gerenciar_consulta_usuario_em_partes(llm, prompt_completo, mensagem.texto):
+            trechos.append(trecho)
+            yield trecho
+        
+        await gerenciador_contexto.adicionar_resposta_bot(
+            usuario_id=mensagem.id_usuario,
+            resposta="".join(trechos)
+        )
+        logger.info(f"Resposta (streaming) gerada para {mensagem.id_usuario}")
+    
+    return StreamingResponse(gerar_resposta(), media_type="text/plain; charset=utf-8")
+
+
 @app.post("/webhook/whatsapp", summary="Webhook do WhatsApp", tags=["WhatsApp"])
 async def webhook_whatsapp(
     request: Request,
@@ -623,16 +690,18 @@ async def webhook_whatsapp(
         
         # Verificar se é um evento de mensagem
         if evento == 'message':
-            # Processar mensagem em background com rastreamento
-            try:
-                task = await tasks.adicionar_task(
-                    processador_whatsapp.processar_mensagem(llm, webhook_data)
-                )
-                logger.debug(f"Task de processamento criada")
-            except RuntimeError as e:
-                logger.error(f"Não foi possível criar task: {e}")
-                # Responder sucesso mesmo assim para não perder mensagens
-                # O WhatsApp tentará reenviar se retornarmos erro
+            # Extrair a mensagem uma única vez e processá-la em background
+            mensagem = extrair_mensagem_webhook(webhook_data)
+            if mensagem is not None:
+                try:
+                    task = await tasks.adicionar_task(
+                        processador_whatsapp.processar_mensagem(llm, mensagem)
+                    )
+                    logger.debug(f"Task de processamento criada")
+                except RuntimeError as e:
+                    logger.error(f"Não foi possível criar task: {e}")
+                    # Responder sucesso mesmo assim para não perder mensagens
+                    # O WhatsApp tentará reenviar se retornarmos erro
         elif evento == 'session.status':
             # Evento de status da sessão
             logger.info(f"Status da sessão atualizado: {webhook_data.get('payload', {}).get('data', {})}")
@@ -965,6 +1034,7 @@ async def informacoes_api():
         },
         "endpoints_principais": {
             "chat": "/chat - Interação com o bot",
+            "chat_stream": "/chat/stream - Interação com o bot em streaming",
             "webhook": "/webhook/whatsapp - Recebimento de mensagens",
             "status": "/whatsapp/status - Status da conexão",
             "health": "/health - Verificação de saúde",
@@ -0,0 +1,62 @@
+# tests/test_entidades.py
+"""
+Testes da conversão das entidades devolvidas pelo LLM (`Entidades.de_dicionario`).
+
+Identificadores malformados devem ser descartados, e não truncados, para que
+a consulta peça a entidade ao usuário em vez de buscar outro cliente ou pedido.
+"""
+
+import pytest
+
+from app.agentes.agente_roteador import Entidades, IntencaoConsulta
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (123, 123),
+    (123.0, 123),
+    ("123", 123),
+    (" 123 ", 123),
+])
+def test_ids_inteiros_sao_aceitos(valor, esperado):
+    entidades = Entidades.de_dicionario({"id_pedido": valor, "codigo_cliente": valor})
+
+    assert entidades.id_pedido == esperado
+    assert entidades.codigo_cliente == esperado
+
+
+@pytest.mark.parametrize("valor", [
+    12.7,
+    "123.9",
+    "12,5",
+    "-5",
+    "abc",
+    "",
+    True,
+    False,
+    float("nan"),
+    float("inf"),
+    [123],
+    {"id": 123},
+])
+def test_ids_malformados_sao_descartados(valor):
+    entidades = Entidades.de_dicionario({"id_pedido": valor, "codigo_cliente": valor, "limite": valor})
+
+    assert entidades.id_pedido is None
+    assert entidades.codigo_cliente is None
+    assert entidades.limite is None
+
+
+def test_id_malformado_nao_afeta_demais_entidades():
+    entidades = Entidades.de_dicionario({"id_pedido": "98765.4", "cidade": "Recife"})
+
+    assert entidades.id_pedido is None
+    assert entidades.cidade == "Recife"
+
+
+def test_intencao_com_id_malformado_fica_sem_id():
+    intencao = IntencaoConsulta(
+        intencao="verificar_posicao_pedido",
+        entidades={"id_pedido": 98765.5},
+    )
+
+    assert intencao.entidades.id_pedido is None